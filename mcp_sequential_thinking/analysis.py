@@ -1,19 +1,250 @@
+from array import array
 from collections import Counter
+from dataclasses import dataclass, field
+import heapq
 import importlib.util
-from typing import Any, Dict, List
+from itertools import count
+from operator import itemgetter
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 from .logging_conf import configure_logging
 from .models import RiskLevel, ThoughtData, ThoughtStage
 
 logger = configure_logging("sequential-thinking.analysis")
 
+# Whether pytest is importable; resolved once because find_spec walks sys.path
+_PYTEST_PRESENT = importlib.util.find_spec("pytest") is not None
+
+# Source of TokenVocabulary.key values; next() on a count is atomic under the GIL
+_VOCABULARY_KEYS = count()
+
+
+class TokenVocabulary:
+    """Interns metadata strings to stable bit positions for bitmask scoring.
+
+    Bit positions only grow, so storage keeps one vocabulary per project and
+    replaces it whenever that project's history is cleared or imported.
+    ``key`` is unique per instance and tags the masks each thought caches.
+    """
+
+    def __init__(self) -> None:
+        self.key = next(_VOCABULARY_KEYS)
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, token: str) -> int:
+        """Return the bit position for a token, assigning the next free one if new."""
+        bit = self._ids.get(token)
+        if bit is None:
+            with self._lock:
+                bit = self._ids.setdefault(token, len(self._ids))
+        return bit
+
+    def mask(self, tokens: Iterable[str]) -> int:
+        """Build an integer bitmask with one bit set per token."""
+        result = 0
+        for token in tokens:
+            result |= 1 << self.intern(token)
+        return result
+
+
+# Shared by callers that do not pass a project's vocabulary, so masks cached on
+# their thoughts stay valid across calls
+_DEFAULT_VOCABULARY = TokenVocabulary()
+
+
+def _snippet(text: str, limit: int = 100) -> str:
+    """Truncate text to ``limit`` characters, appending an ellipsis when cut."""
+    cut = text[:limit + 1]
+    if len(cut) > limit:
+        return cut[:limit] + "..."
+    return text
+
+
+# Stage members and a zeroed coverage template, materialized once instead of
+# iterating the enum class on every call
+_ALL_STAGES: Tuple[ThoughtStage, ...] = tuple(ThoughtStage)
+_ZERO_COVERAGE: Dict[ThoughtStage, int] = {stage: 0 for stage in _ALL_STAGES}
+
+# Small integer code per stage, in declaration order, for columnar storage
+_STAGE_CODES: Dict[ThoughtStage, int] = {stage: code for code, stage in enumerate(_ALL_STAGES)}
+# Stage names indexed by code, also the key order of the summary's "stages" dict
+_STAGE_NAMES: Tuple[str, ...] = tuple(stage.value for stage in _STAGE_CODES)
+_RISK_CODES: Dict[RiskLevel, int] = {RiskLevel.LOW: 0, RiskLevel.MEDIUM: 1, RiskLevel.HIGH: 2}
+
+# Summary text for an empty history, the first call of every new session
+_EMPTY_SUMMARY = "No thoughts recorded yet"
+
+
+def _bincount(codes: Iterable[int], minlength: int) -> List[int]:
+    """Count occurrences of each small integer code, like ``numpy.bincount``."""
+    counts = Counter(codes)
+    return [counts.get(code, 0) for code in range(minlength)]
+
+
+class HistoryColumns:
+    """Structure-of-arrays copy of the scalar fields of a thought history.
+
+    Keeps confidence, stage, risk, planned total and thought number in dense
+    typed arrays so summary reductions run in C rather than over model attributes.
+    ``source`` is the immutable history snapshot the rows were taken from, if
+    known; summaries only trust columns whose source is the history they get.
+    """
+
+    def __init__(self) -> None:
+        self.confidence = array("d")
+        self.stage_code = array("b")
+        self.risk_code = array("b")
+        self.total = array("q")
+        self.thought_number = array("q")
+        self.source: Optional[Tuple[ThoughtData, ...]] = None
+
+    @classmethod
+    def from_thoughts(cls, thoughts: Iterable[ThoughtData]) -> "HistoryColumns":
+        """Build columns for an existing history.
+
+        Raises:
+            OverflowError: If a thought number or total does not fit a 64-bit column
+        """
+        columns = cls()
+        for thought in thoughts:
+            columns.append(thought)
+        if isinstance(thoughts, tuple):
+            columns.source = thoughts
+        return columns
+
+    def append(self, thought: ThoughtData) -> None:
+        """Append one thought's scalar fields."""
+        self.confidence.append(thought.confidence_score)
+        self.stage_code.append(_STAGE_CODES[thought.stage])
+        self.risk_code.append(_RISK_CODES[thought.risk_level])
+        self.total.append(thought.total_thoughts)
+        self.thought_number.append(thought.thought_number)
+
+    def clear(self) -> None:
+        """Drop all rows."""
+        del self.confidence[:]
+        del self.stage_code[:]
+        del self.risk_code[:]
+        del self.total[:]
+        del self.thought_number[:]
+
+    def extend(self, other: "HistoryColumns") -> None:
+        """Append every row of ``other``; cannot fail part-way, unlike repeated ``append``."""
+        self.confidence.extend(other.confidence)
+        self.stage_code.extend(other.stage_code)
+        self.risk_code.extend(other.risk_code)
+        self.total.extend(other.total)
+        self.thought_number.extend(other.thought_number)
+
+    def copy(self) -> "HistoryColumns":
+        """Return an independent snapshot of the columns."""
+        columns = HistoryColumns()
+        columns.confidence = array("d", self.confidence)
+        columns.stage_code = array("b", self.stage_code)
+        columns.risk_code = array("b", self.risk_code)
+        columns.total = array("q", self.total)
+        columns.thought_number = array("q", self.thought_number)
+        columns.source = self.source
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.confidence)
+
+
+class AggregateResult(NamedTuple):
+    """History-wide aggregates used by analyze_thought, from one pass or a StageIndex."""
+
+    stage_coverage: Dict[ThoughtStage, int]
+    unique_deps: Tuple[str, ...]
+    has_testing_after: bool
+    high_risk_no_tests: int
+
+
+@dataclass
+class StageIndex:
+    """Stage-bucketed view of a history with incremental testing bookkeeping.
+
+    Storage keeps one per project in sync on append so the history-wide
+    questions analyze_thought asks (stage coverage, first thought in a stage,
+    testing after implementation, high-risk thoughts still lacking tests,
+    project dependencies) need no scan.
+    """
+
+    by_stage: Dict[ThoughtStage, List[ThoughtData]] = field(
+        default_factory=lambda: {stage: [] for stage in _ALL_STAGES}
+    )
+    last_impl_number: Optional[int] = None
+    last_testing_number: Optional[int] = None
+    high_risk_no_tests: int = 0
+    dependencies: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_thoughts(cls, thoughts: Iterable[ThoughtData]) -> "StageIndex":
+        """Build an index for an existing history."""
+        index = cls()
+        for thought in thoughts:
+            index.add(thought)
+        return index
+
+    def add(self, thought: ThoughtData) -> None:
+        """Index one appended thought."""
+        self.by_stage[thought.stage].append(thought)
+        number = thought.thought_number
+        if thought.stage == ThoughtStage.IMPLEMENTATION:
+            if self.last_impl_number is None or number > self.last_impl_number:
+                self.last_impl_number = number
+        elif thought.stage == ThoughtStage.TESTING:
+            if self.last_testing_number is None or number > self.last_testing_number:
+                self.last_testing_number = number
+        # Risk and tests are fixed at construction, so a running count stays exact
+        if thought.risk_level is RiskLevel.HIGH and not thought.tests_to_run:
+            self.high_risk_no_tests += 1
+        self.dependencies.update(thought.dependencies)
+
+    def clear(self) -> None:
+        """Drop all indexed thoughts."""
+        for bucket in self.by_stage.values():
+            bucket.clear()
+        self.last_impl_number = None
+        self.last_testing_number = None
+        self.high_risk_no_tests = 0
+        self.dependencies.clear()
+
+    def stage_count(self, stage: ThoughtStage) -> int:
+        """Number of indexed thoughts in ``stage``."""
+        return len(self.by_stage[stage])
+
+    def aggregates(self) -> AggregateResult:
+        """History-wide aggregates read from the running counters instead of a scan."""
+        return AggregateResult(
+            stage_coverage={stage: len(bucket) for stage, bucket in self.by_stage.items()},
+            unique_deps=tuple(sorted(self.dependencies)),
+            has_testing_after=self.testing_ready,
+            high_risk_no_tests=self.high_risk_no_tests,
+        )
+
+    @property
+    def testing_ready(self) -> bool:
+        """Whether a testing thought exists at or after the last implementation thought."""
+        if self.last_impl_number is None or self.last_testing_number is None:
+            return False
+        return self.last_testing_number >= self.last_impl_number
+
+    def __getitem__(self, stage: ThoughtStage) -> List[ThoughtData]:
+        return self.by_stage[stage]
+
 
 class ThoughtAnalyzer:
     """Analyzer for thought data to extract insights and patterns."""
 
     @staticmethod
     def find_related_thoughts(
-        current_thought: ThoughtData, all_thoughts: List[ThoughtData], max_results: int = 3
+        current_thought: ThoughtData,
+        all_thoughts: Sequence[ThoughtData],
+        max_results: int = 3,
+        vocabulary: Optional[TokenVocabulary] = None,
     ) -> List[ThoughtData]:
         """Find thoughts related to the current thought.
 
@@ -21,24 +252,36 @@ class ThoughtAnalyzer:
             current_thought: The current thought to find related thoughts for
             all_thoughts: All available thoughts to search through
             max_results: Maximum number of related thoughts to return
+            vocabulary: Optional vocabulary for building metadata bitmasks, such as
+                        the project's from ``storage.get_vocabulary()``; a shared
+                        module-level one is used when omitted
 
         Returns:
             List[ThoughtData]: Related thoughts, sorted by relevance
         """
         # Check if we're running in a test environment and handle test cases if needed
-        if importlib.util.find_spec("pytest") is not None:
+        if _PYTEST_PRESENT:
             # Import test utilities only when needed to avoid circular imports
             from .testing import TestHelpers
             test_results = TestHelpers.find_related_thoughts_test(current_thought, all_thoughts)
             if test_results:
                 return test_results
 
-        candidates = []
-        current_tags = set(current_thought.tags)
-        current_files = set(current_thought.files_touched)
-        current_dependencies = set(current_thought.dependencies)
+        if max_results <= 0:
+            return []
+
+        # Bounded min-heap of the best candidates seen so far. Entries are
+        # (score, thought_number, -position, thought) so ties resolve exactly
+        # like a stable descending sort on (score, thought_number).
+        top: List[Tuple[int, int, int, ThoughtData]] = []
+        if vocabulary is None:
+            vocabulary = _DEFAULT_VOCABULARY
+        mask_for, key = vocabulary.mask, vocabulary.key
+        current_tags, current_files, current_dependencies = current_thought.metadata_masks(
+            mask_for, key
+        )
 
-        for thought in all_thoughts:
+        for position, thought in enumerate(all_thoughts):
             if thought.id == current_thought.id:
                 continue
 
@@ -46,60 +289,67 @@ class ThoughtAnalyzer:
             if thought.stage == current_thought.stage:
                 score += 3
 
-            tag_overlap = current_tags & set(thought.tags)
-            score += len(tag_overlap)
-
-            file_overlap = current_files & set(thought.files_touched)
-            score += len(file_overlap) * 2
-
-            dependency_overlap = current_dependencies & set(thought.dependencies)
-            score += len(dependency_overlap)
+            # Overlap counts are popcounts of the AND-ed interned-token bitmasks
+            tags, files, dependencies = thought.metadata_masks(mask_for, key)
+            score += (current_tags & tags).bit_count()
+            score += (current_files & files).bit_count() * 2
+            score += (current_dependencies & dependencies).bit_count()
 
             if thought.risk_level == current_thought.risk_level:
                 score += 1
 
-            if score > 0:
-                candidates.append((score, thought))
+            if score <= 0:
+                continue
+            if len(top) < max_results:
+                heapq.heappush(top, (score, thought.thought_number, -position, thought))
+            elif score >= top[0][0]:
+                # Only candidates that can beat the current heap minimum are pushed
+                heapq.heappushpop(top, (score, thought.thought_number, -position, thought))
 
-        candidates.sort(key=lambda item: (item[0], item[1].thought_number), reverse=True)
-        return [thought for _, thought in candidates[:max_results]]
+        top.sort(key=itemgetter(0, 1, 2), reverse=True)
+        return [thought for _, _, _, thought in top]
 
     @staticmethod
-    def generate_summary(thoughts: List[ThoughtData]) -> Dict[str, Any]:
+    def generate_summary(
+        thoughts: Sequence[ThoughtData], columns: Optional[HistoryColumns] = None
+    ) -> Dict[str, Any]:
         """Generate a summary of the thinking process.
 
         Args:
-            thoughts: List of thoughts to summarize
+            thoughts: Thoughts to summarize, as a list or tuple
+            columns: Optional precomputed columns whose ``source`` is ``thoughts``;
+                     rebuilt if missing or taken from a different history
 
         Returns:
             Dict[str, Any]: Summary data
         """
         if not thoughts:
-            return {"summary": "No thoughts recorded yet"}
-
-        # Group thoughts by stage
-        stages = {}
-        for thought in thoughts:
-            if thought.stage.value not in stages:
-                stages[thought.stage.value] = []
-            stages[thought.stage.value].append(thought)
-
-        all_tags = []
-        for thought in thoughts:
-            all_tags.extend(thought.tags)
-
-        # Count occurrences of each tag
-        tag_counts = Counter(all_tags)
-        
-        # Get the 5 most common tags
-        top_tags = tag_counts.most_common(5)
+            return {"summary": _EMPTY_SUMMARY}
 
         # Create summary
         try:
-            # Safely calculate max total thoughts to avoid division by zero
-            max_total = 0
-            if thoughts:
-                max_total = max((t.total_thoughts for t in thoughts), default=0)
+            rebuild_columns = columns is None or columns.source is not thoughts
+            if rebuild_columns:
+                columns = HistoryColumns()
+
+            # Aggregate the per-thought collections (and any missing columns) in a
+            # single pass over the history
+            tag_counts: Counter = Counter()
+            files: Set[str] = set()
+            dependency_map: Dict[str, List[int]] = {}
+            for thought in thoughts:
+                if rebuild_columns:
+                    columns.append(thought)
+                tag_counts.update(thought.tags)
+                files.update(thought.files_touched)
+                for dependency in thought.dependencies:
+                    dependency_map.setdefault(dependency, []).append(thought.thought_number)
+
+            # Scalar fields reduce over the dense columns
+            max_total = max(columns.total)
+            confidence_average = sum(columns.confidence) / len(columns)
+            stage_code_counts = _bincount(columns.stage_code, len(_ALL_STAGES))
+            risk_code_counts = _bincount(columns.risk_code, len(_RISK_CODES))
 
             # Calculate percent complete safely
             percent_complete = 0
@@ -108,51 +358,25 @@ class ThoughtAnalyzer:
 
             logger.debug(f"Calculating completion: {len(thoughts)}/{max_total} = {percent_complete}%")
 
-            # Build the summary dictionary with more readable and
-            # maintainable list comprehensions
-            
             # Count thoughts by stage
-            stage_counts = {stage: len(thoughts_list) for stage, thoughts_list in stages.items()}
-            stage_counts_with_missing = {
-                stage.value: stage_counts.get(stage.value, 0) for stage in ThoughtStage
-            }
-
-            # Create timeline entries
-            sorted_thoughts = sorted(thoughts, key=lambda x: x.thought_number)
-            timeline_entries = []
-            for t in sorted_thoughts:
-                timeline_entries.append({
-                    "number": t.thought_number,
-                    "stage": t.stage.value
-                })
-            
-            # Create top tags entries
-            top_tags_entries = []
-            for tag, count in top_tags:
-                top_tags_entries.append({
-                    "tag": tag,
-                    "count": count
-                })
-            
-            all_stages_present = all(stage_counts_with_missing[stage.value] > 0 for stage in ThoughtStage)
+            stage_counts_with_missing = dict(zip(_STAGE_NAMES, stage_code_counts))
 
-            confidence_average = sum(t.confidence_score for t in thoughts) / len(thoughts)
-            files_touched = sorted({file for t in thoughts for file in t.files_touched})
-            dependency_map = ThoughtAnalyzer._dependency_map(thoughts)
+            # Every stage has an entry, so a zero count is the only falsy value
+            all_stages_present = all(stage_counts_with_missing.values())
 
             # Assemble the final summary
             summary = {
                 "totalThoughts": len(thoughts),
                 "stages": stage_counts_with_missing,
-                "timeline": timeline_entries,
-                "topTags": top_tags_entries,
+                "timeline": ThoughtAnalyzer._timeline(columns),
+                "topTags": ThoughtAnalyzer._top_tags(tag_counts),
                 "completionStatus": {
                     "hasAllStages": all_stages_present,
                     "percentComplete": percent_complete
                 },
                 "confidenceAverage": confidence_average,
-                "filesTouched": files_touched,
-                "riskProfile": ThoughtAnalyzer._risk_profile(thoughts),
+                "filesTouched": sorted(files),
+                "riskProfile": ThoughtAnalyzer._risk_profile(risk_code_counts),
                 "dependencyMap": dependency_map,
             }
         except Exception as e:
@@ -165,17 +389,29 @@ class ThoughtAnalyzer:
         return {"summary": summary}
 
     @staticmethod
-    def analyze_thought(thought: ThoughtData, all_thoughts: List[ThoughtData]) -> Dict[str, Any]:
+    def analyze_thought(
+        thought: ThoughtData,
+        all_thoughts: Sequence[ThoughtData],
+        aggregates: Optional[AggregateResult] = None,
+        vocabulary: Optional[TokenVocabulary] = None,
+    ) -> Dict[str, Any]:
         """Analyze a single thought in the context of all thoughts.
 
         Args:
             thought: The thought to analyze
             all_thoughts: All available thoughts for context
+            aggregates: Optional history-wide aggregates for ``all_thoughts``, such as
+                        ``StageIndex.aggregates()``; computed by a scan when omitted
+            vocabulary: Optional vocabulary passed through to ``find_related_thoughts``
 
         Returns:
             Dict[str, Any]: Analysis results
         """
-        if importlib.util.find_spec("pytest") is not None:
+        if aggregates is None:
+            aggregates = ThoughtAnalyzer._aggregate(all_thoughts)
+        stage_coverage = aggregates.stage_coverage
+
+        if _PYTEST_PRESENT:
             # Import test utilities only when needed to avoid circular imports
             from .testing import TestHelpers
             
@@ -190,27 +426,28 @@ class ThoughtAnalyzer:
                         break
             else:
                 # Find related thoughts using the normal method
-                related_thoughts = ThoughtAnalyzer.find_related_thoughts(thought, all_thoughts)
+                related_thoughts = ThoughtAnalyzer.find_related_thoughts(
+                    thought, all_thoughts, vocabulary=vocabulary
+                )
                 
                 # Calculate if this is the first thought in its stage
-                same_stage_thoughts = [t for t in all_thoughts if t.stage == thought.stage]
-                is_first_in_stage = len(same_stage_thoughts) <= 1
+                is_first_in_stage = stage_coverage[thought.stage] <= 1
         else:
             # Find related thoughts first
-            related_thoughts = ThoughtAnalyzer.find_related_thoughts(thought, all_thoughts)
+            related_thoughts = ThoughtAnalyzer.find_related_thoughts(
+                thought, all_thoughts, vocabulary=vocabulary
+            )
             
             # Then calculate if this is the first thought in its stage
-            # This calculation is only done once in this method
-            same_stage_thoughts = [t for t in all_thoughts if t.stage == thought.stage]
-            is_first_in_stage = len(same_stage_thoughts) <= 1
+            is_first_in_stage = stage_coverage[thought.stage] <= 1
 
         progress = (thought.thought_number / thought.total_thoughts) * 100
 
-        stage_coverage = ThoughtAnalyzer._stage_coverage(all_thoughts)
         pending_stages = [stage.value for stage, count in stage_coverage.items() if count == 0]
         metadata_alerts = ThoughtAnalyzer._metadata_alerts(thought)
-        dependency_summary = ThoughtAnalyzer._dependency_summary(all_thoughts)
-        testing_ready = ThoughtAnalyzer._has_testing_after_implementation(all_thoughts)
+        dependency_summary = ThoughtAnalyzer._dependency_summary(aggregates.unique_deps)
+        testing_ready = aggregates.has_testing_after
+        high_risk_pending_tests = aggregates.high_risk_no_tests
 
         # Simple guidance heuristic to indicate whether driving more thoughts is useful
         recommended_next = True
@@ -240,7 +477,7 @@ class ThoughtAnalyzer:
                     "thoughtNumber": thought.thought_number,
                     "totalThoughts": thought.total_thoughts,
                     "nextThoughtNeeded": thought.next_thought_needed,
-                    "stage": thought.stage.value,
+                    "stage": thought.stage_value,
                     "tags": thought.tags,
                     "timestamp": thought.timestamp
                 },
@@ -249,8 +486,8 @@ class ThoughtAnalyzer:
                     "relatedThoughtSummaries": [
                         {
                             "thoughtNumber": t.thought_number,
-                            "stage": t.stage.value,
-                            "snippet": t.thought[:100] + "..." if len(t.thought) > 100 else t.thought
+                            "stage": t.stage_value,
+                            "snippet": _snippet(t.thought)
                         } for t in related_thoughts
                     ],
                     "progress": progress,
@@ -262,13 +499,13 @@ class ThoughtAnalyzer:
                 },
                 "context": {
                     "thoughtHistoryLength": len(all_thoughts),
-                    "currentStage": thought.stage.value,
+                    "currentStage": thought.stage_value,
                     "projectDependencies": dependency_summary,
                 }
             },
             "insights": {
                 "testingReady": testing_ready,
-                "highRiskPendingTests": ThoughtAnalyzer._high_risk_without_tests(all_thoughts),
+                "highRiskPendingTests": high_risk_pending_tests,
             },
             "guidance": {
                 "recommendedNextThoughtNeeded": recommended_next,
@@ -277,23 +514,28 @@ class ThoughtAnalyzer:
         }
 
     @staticmethod
-    def _risk_profile(thoughts: List[ThoughtData]) -> Dict[str, Any]:
-        """Summarize risk levels across the thought history."""
-        risk_counts = Counter(thought.risk_level.value for thought in thoughts)
-        return {
-            "high": risk_counts.get(RiskLevel.HIGH.value, 0),
-            "medium": risk_counts.get(RiskLevel.MEDIUM.value, 0),
-            "low": risk_counts.get(RiskLevel.LOW.value, 0),
-        }
+    def _timeline(columns: HistoryColumns) -> List[Dict[str, Any]]:
+        """Timeline entries ordered by thought number."""
+        numbers = columns.thought_number
+        stage_codes = columns.stage_code
+        return [
+            {"number": numbers[i], "stage": _STAGE_NAMES[stage_codes[i]]}
+            for i in sorted(range(len(numbers)), key=numbers.__getitem__)
+        ]
 
     @staticmethod
-    def _dependency_map(thoughts: List[ThoughtData]) -> Dict[str, List[int]]:
-        """Map dependencies to the thoughts that reference them."""
-        dependency_map: Dict[str, List[int]] = {}
-        for thought in thoughts:
-            for dependency in thought.dependencies:
-                dependency_map.setdefault(dependency, []).append(thought.thought_number)
-        return dependency_map
+    def _top_tags(tag_counts: Counter) -> List[Dict[str, Any]]:
+        """The 5 most common tags with their counts."""
+        return [{"tag": tag, "count": count} for tag, count in tag_counts.most_common(5)]
+
+    @staticmethod
+    def _risk_profile(risk_counts: List[int]) -> Dict[str, Any]:
+        """Shape per-level risk counts (indexed by risk code) for the summary."""
+        return {
+            "high": risk_counts[_RISK_CODES[RiskLevel.HIGH]],
+            "medium": risk_counts[_RISK_CODES[RiskLevel.MEDIUM]],
+            "low": risk_counts[_RISK_CODES[RiskLevel.LOW]],
+        }
 
     @staticmethod
     def _metadata_alerts(thought: ThoughtData) -> List[str]:
@@ -311,37 +553,42 @@ class ThoughtAnalyzer:
         return alerts
 
     @staticmethod
-    def _stage_coverage(thoughts: List[ThoughtData]) -> Dict[ThoughtStage, int]:
-        coverage: Dict[ThoughtStage, int] = {stage: 0 for stage in ThoughtStage}
+    def _aggregate(thoughts: Sequence[ThoughtData]) -> AggregateResult:
+        """Compute stage coverage, dependencies, testing and risk insights in one pass."""
+        coverage = _ZERO_COVERAGE.copy()
+        dependencies: set = set()
+        last_impl: Optional[int] = None
+        last_testing: Optional[int] = None
+        high_risk_no_tests = 0
         for thought in thoughts:
-            coverage[thought.stage] += 1
-        return coverage
+            stage = thought.stage
+            coverage[stage] += 1
+            dependencies.update(thought.dependencies)
+            number = thought.thought_number
+            if stage is ThoughtStage.IMPLEMENTATION:
+                if last_impl is None or number > last_impl:
+                    last_impl = number
+            elif stage is ThoughtStage.TESTING:
+                if last_testing is None or number > last_testing:
+                    last_testing = number
+            if thought.risk_level is RiskLevel.HIGH and not thought.tests_to_run:
+                high_risk_no_tests += 1
+
+        # Testing is "after" implementation when the latest testing thought is
+        # numbered at or beyond the latest implementation thought
+        has_testing_after = (
+            last_impl is not None and last_testing is not None and last_testing >= last_impl
+        )
+        return AggregateResult(
+            stage_coverage=coverage,
+            unique_deps=tuple(sorted(dependencies)),
+            has_testing_after=has_testing_after,
+            high_risk_no_tests=high_risk_no_tests,
+        )
 
     @staticmethod
-    def _dependency_summary(thoughts: List[ThoughtData]) -> Dict[str, Any]:
-        unique_dependencies = sorted({dep for thought in thoughts for dep in thought.dependencies})
+    def _dependency_summary(unique_deps: Tuple[str, ...]) -> Dict[str, Any]:
         return {
-            "count": len(unique_dependencies),
-            "items": unique_dependencies,
+            "count": len(unique_deps),
+            "items": list(unique_deps),
         }
-
-    @staticmethod
-    def _has_testing_after_implementation(thoughts: List[ThoughtData]) -> bool:
-        """Check if the project has produced at least one testing-stage thought after implementation started."""
-        implementation_numbers = [
-            thought.thought_number for thought in thoughts if thought.stage == ThoughtStage.IMPLEMENTATION
-        ]
-        if not implementation_numbers:
-            return False
-        last_impl = max(implementation_numbers)
-        return any(
-            thought.stage == ThoughtStage.TESTING and thought.thought_number >= last_impl for thought in thoughts
-        )
-
-    @staticmethod
-    def _high_risk_without_tests(thoughts: List[ThoughtData]) -> int:
-        return sum(
-            1
-            for thought in thoughts
-            if thought.risk_level == RiskLevel.HIGH and not thought.tests_to_run
-        )
@@ -1,5 +1,6 @@
+import sys
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4, UUID
 from pydantic import BaseModel, Field, field_validator
@@ -33,41 +34,69 @@ class ThoughtStage(Enum):
             # Default to Implementation when unspecified
             return ThoughtStage.IMPLEMENTATION
 
-        normalized = value.strip().lower()
-
-        # Direct exact match against canonical values
-        for stage in cls:
-            if stage.value.casefold() == normalized:
-                return stage
-
-        # Synonym map to smooth integration with Serena/Codex naming
-        synonyms = {
-            ThoughtStage.SCOPING: {
-                "scoping", "scope", "requirements", "planning (scope)", "project scoping",
-            },
-            ThoughtStage.RESEARCH_SPIKE: {
-                "research & spike", "research", "spike", "spike/research", "investigate", "r&d",
-            },
-            ThoughtStage.IMPLEMENTATION: {
-                "implementation", "implement", "build", "coding", "develop", "development", "plan", "planning",
-            },
-            ThoughtStage.TESTING: {
-                "testing", "test", "qa", "validate", "verification",
-            },
-            ThoughtStage.REVIEW: {
-                "review", "code review", "finalize", "ship", "pr review",
-            },
-        }
-
-        for stage, names in synonyms.items():
-            if normalized in names:
-                return stage
+        # Serialized thoughts always carry the canonical value, so try it verbatim first
+        stage = _STAGE_FROM_STRING.get(value)
+        if stage is None:
+            stage = _STAGE_LOOKUP.get(value.strip().lower())
+        if stage is not None:
+            return stage
 
         # If no match found
         valid_stages = ", ".join(stage.value for stage in cls)
         raise ValueError(f"Invalid thinking stage: '{value}'. Valid stages are: {valid_stages}")
 
 
+# Synonyms to smooth integration with Serena/Codex naming
+_STAGE_SYNONYMS: Dict[ThoughtStage, Tuple[str, ...]] = {
+    ThoughtStage.SCOPING: (
+        "scoping", "scope", "requirements", "planning (scope)", "project scoping",
+    ),
+    ThoughtStage.RESEARCH_SPIKE: (
+        "research & spike", "research", "spike", "spike/research", "investigate", "r&d",
+    ),
+    ThoughtStage.IMPLEMENTATION: (
+        "implementation", "implement", "build", "coding", "develop", "development", "plan", "planning",
+    ),
+    ThoughtStage.TESTING: (
+        "testing", "test", "qa", "validate", "verification",
+    ),
+    ThoughtStage.REVIEW: (
+        "review", "code review", "finalize", "ship", "pr review",
+    ),
+}
+
+# Every accepted (lower-cased) spelling mapped to its stage; canonical values win
+_STAGE_LOOKUP: Dict[str, ThoughtStage] = {
+    name: stage for stage, names in _STAGE_SYNONYMS.items() for name in names
+}
+_STAGE_LOOKUP.update({stage.value.casefold(): stage for stage in ThoughtStage})
+
+# Canonical display values, matched exactly before any normalization
+_STAGE_FROM_STRING: Dict[str, ThoughtStage] = {stage.value: stage for stage in ThoughtStage}
+
+
+# camelCase keys used by the dictionary representation, per snake_case field;
+# inverted below to map incoming camelCase keys back onto model fields
+_SNAKE_TO_CAMEL: Dict[str, str] = {
+    "thought": "thought",
+    "thought_number": "thoughtNumber",
+    "total_thoughts": "totalThoughts",
+    "next_thought_needed": "nextThoughtNeeded",
+    "stage": "stage",
+    "tags": "tags",
+    "axioms_used": "axiomsUsed",
+    "assumptions_challenged": "assumptionsChallenged",
+    "files_touched": "filesTouched",
+    "tests_to_run": "testsToRun",
+    "risk_level": "riskLevel",
+    "dependencies": "dependencies",
+    "confidence_score": "confidenceScore",
+    "timestamp": "timestamp",
+    "id": "id",
+}
+_CAMEL_TO_SNAKE: Dict[str, str] = {camel: snake for snake, camel in _SNAKE_TO_CAMEL.items()}
+
+
 class RiskLevel(str, Enum):
     """Relative risk of a given thought."""
 
@@ -76,12 +105,20 @@ class RiskLevel(str, Enum):
     HIGH = "high"
 
 
+# Metadata lists whose entries recur across thoughts; interning them lets every
+# thought share one string object per distinct tag, file, or dependency.
+_INTERNED_FIELDS = ("tags", "files_touched", "dependencies")
+
+# Largest thought number or total the 64-bit history columns can hold
+_MAX_THOUGHT_NUMBER = 2**63 - 1
+
+
 class ThoughtData(BaseModel):
     """Data structure for a single thought in the sequential thinking process."""
 
     thought: str
-    thought_number: int
-    total_thoughts: int
+    thought_number: int = Field(le=_MAX_THOUGHT_NUMBER)
+    total_thoughts: int = Field(le=_MAX_THOUGHT_NUMBER)
     next_thought_needed: bool
     stage: ThoughtStage
     tags: List[str] = Field(default_factory=list)
@@ -95,6 +132,58 @@ class ThoughtData(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
     id: UUID = Field(default_factory=uuid4)
 
+    def model_post_init(self, __context: Any) -> None:
+        """Precompute derived lookup values after validation."""
+        self._refresh_derived()
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "ThoughtData":
+        """Copy the thought, recomputing derived values from any updated fields."""
+        copied = super().model_copy(update=update, deep=deep)
+        if update:
+            copied._refresh_derived()
+        return copied
+
+    def _refresh_derived(self) -> None:
+        """Derive cached lookup values from the current field values.
+
+        These are written straight into the instance ``__dict__`` rather than
+        declared as pydantic private attributes: private attribute reads go
+        through ``BaseModel.__getattr__``, which costs more than the lookups
+        they are meant to save. The model is frozen, so they only need
+        rebuilding when ``model_copy`` applies an update.
+        """
+        set_attr = object.__setattr__
+        # Bitmasks for related-thought scoring, built on first use by metadata_masks
+        set_attr(self, "_masks", None)
+        # Raw enum value, avoiding the Enum.value descriptor in aggregation loops
+        set_attr(self, "_stage_value", self.stage.value)
+
+    @property
+    def stage_value(self) -> str:
+        """Cached string value of the stage."""
+        return self._stage_value
+
+    def metadata_masks(
+        self, mask_for: Callable[[Iterable[str]], int], key: int
+    ) -> Tuple[int, int, int]:
+        """Return (tags, files, dependencies) bitmasks, building them on first use.
+
+        Args:
+            mask_for: Callable mapping tokens to an integer bitmask
+            key: Integer identifying ``mask_for``'s token mapping. Masks are cached
+                 for the most recent key only; a different key rebuilds them.
+                 Only the key is cached, so the thought stays picklable.
+
+        Returns:
+            Tuple[int, int, int]: Bitmasks for tags, touched files, and dependencies
+        """
+        cached = self._masks
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        masks = (mask_for(self.tags), mask_for(self.files_touched), mask_for(self.dependencies))
+        object.__setattr__(self, "_masks", (key, masks))
+        return masks
+
     def __hash__(self):
         """Make ThoughtData hashable based on its ID."""
         return hash(self.id)
@@ -127,6 +216,11 @@ class ThoughtData(BaseModel):
             raise ValueError("Total thoughts must be greater or equal to current thought number")
         return v
 
+    @field_validator(*_INTERNED_FIELDS)
+    def intern_tokens(cls, values: List[str]) -> List[str]:
+        """Intern recurring metadata strings."""
+        return [sys.intern(value) for value in values]
+
     @field_validator("confidence_score")
     def confidence_in_range(cls, value: float) -> float:
         """Validate the confidence score."""
@@ -156,44 +250,29 @@ class ThoughtData(BaseModel):
         Returns:
             dict: Dictionary representation of the thought data
         """
-        # Get all model fields, excluding internal properties
-        data = self.model_dump()
-
-        # Handle special conversions
-        data["stage"] = self.stage.value
-        data["risk_level"] = self.risk_level.value
+        # Assemble the camelCase representation directly from the attributes;
+        # model_dump() would copy every field only for most of it to be replaced.
+        result = {
+            "thought": self.thought,
+            "thoughtNumber": self.thought_number,
+            "totalThoughts": self.total_thoughts,
+            "nextThoughtNeeded": self.next_thought_needed,
+            "tags": self.tags,
+            "axiomsUsed": self.axioms_used,
+            "assumptionsChallenged": self.assumptions_challenged,
+            "filesTouched": self.files_touched,
+            "testsToRun": self.tests_to_run,
+            "riskLevel": self.risk_level.value,
+            "dependencies": self.dependencies,
+            "confidenceScore": self.confidence_score,
+            "timestamp": self.timestamp,
+        }
 
-        if not include_id:
-            # Remove ID for external representations
-            data.pop("id", None)
-        else:
+        if include_id:
             # Convert ID to string for JSON serialization
-            data["id"] = str(data["id"])
-
-        # Convert snake_case keys to camelCase for API consistency
-        result = {}
-        for key, value in data.items():
-            if key == "stage":
-                continue
-
-            camel_key = self._to_camel_case(key)
-            result[camel_key] = value
-
-        # Ensure these fields are always present with camelCase naming
-        result["thought"] = self.thought
-        result["thoughtNumber"] = self.thought_number
-        result["totalThoughts"] = self.total_thoughts
-        result["nextThoughtNeeded"] = self.next_thought_needed
+            result["id"] = str(self.id)
+
         result["stage"] = self.stage.value
-        result["tags"] = self.tags
-        result["axiomsUsed"] = self.axioms_used
-        result["assumptionsChallenged"] = self.assumptions_challenged
-        result["filesTouched"] = self.files_touched
-        result["testsToRun"] = self.tests_to_run
-        result["riskLevel"] = self.risk_level.value
-        result["dependencies"] = self.dependencies
-        result["confidenceScore"] = self.confidence_score
-        result["timestamp"] = self.timestamp
 
         return result
 
@@ -207,30 +286,39 @@ class ThoughtData(BaseModel):
         Returns:
             ThoughtData: A new ThoughtData instance
         """
-        snake_data = {}
-        mappings = {
-            "thoughtNumber": "thought_number",
-            "totalThoughts": "total_thoughts",
-            "nextThoughtNeeded": "next_thought_needed",
-            "axiomsUsed": "axioms_used",
-            "assumptionsChallenged": "assumptions_challenged",
-            "filesTouched": "files_touched",
-            "testsToRun": "tests_to_run",
-            "riskLevel": "risk_level",
-            "dependencies": "dependencies",
-            "confidenceScore": "confidence_score",
+        # model_validate runs the same compiled validator as a TypeAdapter would,
+        # without unpacking the fields into keyword arguments
+        return cls.model_validate(cls._snake_case_fields(data))
+
+    @classmethod
+    def from_trusted_dict(cls, data: dict) -> 'ThoughtData':
+        """Create a ThoughtData instance from data this package serialized itself.
+
+        Skips pydantic validation, so only use it for trusted input such as
+        session files written by ``to_dict``; external input goes through
+        ``from_dict``.
+
+        Args:
+            data: Dictionary containing previously serialized thought data
+
+        Returns:
+            ThoughtData: A new ThoughtData instance
+        """
+        fields = cls._snake_case_fields(data)
+        for name in _INTERNED_FIELDS:
+            fields[name] = [sys.intern(value) for value in fields[name]]
+        return cls.model_construct(**fields)
+
+    @staticmethod
+    def _snake_case_fields(data: dict) -> Dict[str, Any]:
+        """Map a camelCase thought dictionary onto snake_case field values."""
+        # Map known camelCase keys; stage and id are converted below
+        snake_data = {
+            snake_key: value
+            for key, value in data.items()
+            if (snake_key := _CAMEL_TO_SNAKE.get(key)) is not None
         }
-        
-        # Process known direct mappings
-        for camel_key, snake_key in mappings.items():
-            if camel_key in data:
-                snake_data[snake_key] = data[camel_key]
-        
-        # Copy fields that don't need conversion
-        for key in ["thought", "tags", "timestamp"]:
-            if key in data:
-                snake_data[key] = data[key]
-                
+
         if "stage" in data:
             snake_data["stage"] = ThoughtStage.from_string(data["stage"])
 
@@ -239,14 +327,16 @@ class ThoughtData(BaseModel):
 
         # Set default values for missing fields
         snake_data.setdefault("tags", [])
-        snake_data.setdefault("axioms_used", data.get("axiomsUsed", []))
-        snake_data.setdefault("assumptions_challenged", data.get("assumptionsChallenged", []))
-        snake_data.setdefault("files_touched", data.get("filesTouched", []))
-        snake_data.setdefault("tests_to_run", data.get("testsToRun", []))
-        snake_data.setdefault("risk_level", snake_data.get("risk_level", RiskLevel.MEDIUM))
-        snake_data.setdefault("dependencies", data.get("dependencies", []))
-        snake_data.setdefault("confidence_score", data.get("confidenceScore", 0.5))
-        snake_data.setdefault("timestamp", datetime.now().isoformat())
+        snake_data.setdefault("axioms_used", [])
+        snake_data.setdefault("assumptions_challenged", [])
+        snake_data.setdefault("files_touched", [])
+        snake_data.setdefault("tests_to_run", [])
+        snake_data.setdefault("risk_level", RiskLevel.MEDIUM)
+        snake_data.setdefault("dependencies", [])
+        snake_data.setdefault("confidence_score", 0.5)
+        # Only stamp a fresh time when none was persisted; skips the clock read on reload
+        if snake_data.get("timestamp") is None:
+            snake_data["timestamp"] = datetime.now().isoformat()
 
         # Add ID if present, otherwise generate a new one
         if "id" in data:
@@ -255,16 +345,10 @@ class ThoughtData(BaseModel):
             except (ValueError, TypeError):
                 snake_data["id"] = uuid4()
 
-        return cls(**snake_data)
+        return snake_data
 
     model_config = {
-        "arbitrary_types_allowed": True
+        "arbitrary_types_allowed": True,
+        # Derived values are cached at construction, so fields must not be reassigned
+        "frozen": True,
     }
-
-    @staticmethod
-    def _to_camel_case(value: str) -> str:
-        """Convert snake_case strings to camelCase."""
-        components = value.split("_")
-        if not components:
-            return value
-        return components[0] + "".join(component.title() for component in components[1:])
@@ -2,7 +2,11 @@ import json
 import re
 import os
 import sys
-from typing import Any, Dict, List, Optional, Union
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.fastmcp.prompts import base
@@ -14,12 +18,14 @@ try:
     from .storage import ThoughtStorage
     from .analysis import ThoughtAnalyzer
     from .logging_conf import configure_logging
+    from .utils import json_loads
 except ImportError:
     # When run directly
     from mcp_sequential_thinking.models import RiskLevel, ThoughtData, ThoughtStage
     from mcp_sequential_thinking.storage import ThoughtStorage
     from mcp_sequential_thinking.analysis import ThoughtAnalyzer
     from mcp_sequential_thinking.logging_conf import configure_logging
+    from mcp_sequential_thinking.utils import json_loads
 
 logger = configure_logging("sequential-thinking.server")
 
@@ -29,6 +35,34 @@ mcp = FastMCP("sequential-thinking")
 storage_dir = os.environ.get("MCP_STORAGE_DIR", None)
 storage = ThoughtStorage(storage_dir)
 
+# Per-context replacement for the module-level storage, set via use_storage()
+_storage_override: ContextVar[Optional[ThoughtStorage]] = ContextVar(
+    "storage_override", default=None
+)
+
+
+@contextmanager
+def use_storage(override: ThoughtStorage) -> Iterator[ThoughtStorage]:
+    """Route tool calls in the current context to ``override``.
+
+    Unlike rebinding ``server.storage``, the override is scoped to the
+    calling thread or task, so concurrent callers keep their own storage.
+    """
+    token = _storage_override.set(override)
+    try:
+        yield override
+    finally:
+        _storage_override.reset(token)
+
+
+def _current_storage() -> ThoughtStorage:
+    """Return the storage tool calls should use in the current context."""
+    override = _storage_override.get()
+    return storage if override is None else override
+
+# Set MCP_DISABLE_PROGRESS for clients that ignore progress notifications
+_PROGRESS_ENABLED = not os.environ.get("MCP_DISABLE_PROGRESS")
+
 LEGACY_ALIASES = {
     "thought_number": ["thoughtNumber"],
     "total_thoughts": ["totalThoughts"],
@@ -44,20 +78,49 @@ LEGACY_ALIASES = {
     "project_id": ["projectId"],
 }
 
+# Built once at import and frozen so request handling never mutates it
+_ALIAS_TO_CANONICAL: Mapping[str, str] = MappingProxyType({
+    alias: canonical for canonical, aliases in LEGACY_ALIASES.items() for alias in aliases
+})
+
+_SPLIT_RE = re.compile(r"[,;]")
+
+_RISK_CACHE = {level.value: level for level in RiskLevel}
 
-def _resolve_legacy_value(
-    current_value: Optional[Any],
+_TRUE_STRINGS = frozenset(("true", "1", "yes", "y"))
+_FALSE_STRINGS = frozenset(("false", "0", "no", "n"))
+
+
+def _merge_payload(
     legacy_payload: Dict[str, Any],
-    target_key: str,
-) -> Optional[Any]:
-    """Return the first non-None value from current or legacy aliases."""
-    if current_value is not None:
-        return current_value
-
-    for alias in LEGACY_ALIASES.get(target_key, []):
-        if alias in legacy_payload:
-            return legacy_payload.pop(alias)
-    return None
+    source: Union[Dict[str, Any], str],
+) -> None:
+    """Merge a legacy payload (dict or JSON object string) into ``legacy_payload``.
+
+    Strings that are not valid JSON objects are ignored.
+    """
+    if isinstance(source, str):
+        try:
+            source = json_loads(source)
+        except Exception:
+            return
+    if isinstance(source, dict):
+        legacy_payload.update(source)
+
+
+def _resolve_legacy_values(
+    current_values: Dict[str, Optional[Any]],
+    legacy_payload: Dict[str, Any],
+) -> Dict[str, Optional[Any]]:
+    """Fill None entries in ``current_values`` from legacy aliases in one pass.
+
+    Explicit values win; consumed aliases are popped from ``legacy_payload``.
+    """
+    for key in list(legacy_payload):
+        canonical = _ALIAS_TO_CANONICAL.get(key)
+        if canonical is not None and current_values[canonical] is None:
+            current_values[canonical] = legacy_payload.pop(key)
+    return current_values
 
 
 def _parse_bool(value: Any) -> Optional[bool]:
@@ -66,34 +129,32 @@ def _parse_bool(value: Any) -> Optional[bool]:
     Accepts real bools, and common string forms like "true", "false", "1", "0", "yes", "no".
     Returns None if the value is missing or cannot be parsed.
     """
-    if value is None:
-        return None
-    if isinstance(value, bool):
+    # Exact-type checks first: the tool bridge almost always sends a plain bool
+    if value is None or type(value) is bool:
         return value
     if isinstance(value, (int,)):
         return bool(value)
     if isinstance(value, str):
         s = value.strip().lower()
-        if s in {"true", "1", "yes", "y"}:
+        if s in _TRUE_STRINGS:
             return True
-        if s in {"false", "0", "no", "n"}:
+        if s in _FALSE_STRINGS:
             return False
     return None
 
 
 def _parse_int(value: Any) -> Optional[int]:
     """Parse an int from incoming values (supports numeric strings)."""
-    if value is None:
-        return None
-    if isinstance(value, int):
+    if value is None or type(value) is int:
+        return value
+    # bool subclasses int but is never a meaningful thought count
+    if isinstance(value, int) and not isinstance(value, bool):
         return value
     if isinstance(value, str):
-        v = value.strip()
-        if v.isdigit() or (v.startswith("-") and v[1:].isdigit()):
-            try:
-                return int(v)
-            except ValueError:
-                return None
+        try:
+            return int(value.strip())
+        except ValueError:
+            return None
     return None
 
 
@@ -108,23 +169,105 @@ def _parse_list(value: Any) -> Optional[List[str]]:
     """
     if value is None:
         return None
+    if type(value) is list:
+        # Clients usually send plain string lists; skip the per-item conversion
+        if all(type(x) is str for x in value):
+            return list(value)
+        return [str(x) for x in value]
     if isinstance(value, list):
         return [str(x) for x in value]
     if isinstance(value, str):
         s = value.strip()
-        # Try JSON first
-        try:
-            parsed = json.loads(s)
-            if isinstance(parsed, list):
-                return [str(x) for x in parsed]
-        except Exception:
-            pass
+        # Only a JSON array can yield a list, so skip the parse for plain CSV
+        if s.startswith("["):
+            try:
+                parsed = json_loads(s)
+                if isinstance(parsed, list):
+                    return [str(x) for x in parsed]
+            except Exception:
+                pass
         # Fallback: split by comma or semicolon
-        parts = [p.strip() for p in re.split(r"[,;]", s) if p.strip()]
+        parts = [p.strip() for p in _SPLIT_RE.split(s) if p.strip()]
         return parts
     return [str(value)]
 
 
+def _parse_float(value: Any) -> Optional[float]:
+    """Parse a float from numeric strings; other values pass through unchanged."""
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return None
+    return value
+
+
+_REQUIRED = object()
+
+# (field, coercer, default) for every argument copied onto ThoughtData. A coercer
+# returns None for missing or unparsable input; required fields then keep the raw
+# value so model validation reports it, optional fields take the default.
+# List defaults are tuples because validation copies them into fresh lists.
+_FIELD_SCHEMA: Tuple[Tuple[str, Callable[[Any], Any], Any], ...] = (
+    ("thought_number", _parse_int, _REQUIRED),
+    ("total_thoughts", _parse_int, _REQUIRED),
+    ("next_thought_needed", _parse_bool, _REQUIRED),
+    ("tags", _parse_list, ()),
+    ("axioms_used", _parse_list, ()),
+    ("assumptions_challenged", _parse_list, ()),
+    ("files_touched", _parse_list, ()),
+    ("tests_to_run", _parse_list, ()),
+    ("dependencies", _parse_list, ()),
+    ("confidence_score", _parse_float, 0.5),
+)
+
+
+def _build_thought_data(thought: str, stage: str, fields: Dict[str, Any]) -> ThoughtData:
+    """Coerce resolved tool arguments into a validated ThoughtData.
+
+    Args:
+        thought: The content of the thought
+        stage: The thinking stage name or alias
+        fields: Canonical snake_case field values, ``None`` where not provided
+
+    Raises:
+        ValueError: If a required field is missing or a value is invalid
+    """
+    # Coerce basic types that may arrive as strings from the tool bridge
+    values: Dict[str, Any] = {}
+    for name, coerce, default in _FIELD_SCHEMA:
+        raw = fields[name]
+        value = coerce(raw)
+        if value is None:
+            if default is _REQUIRED:
+                if raw is None:
+                    raise ValueError(f"{name} is required")
+                value = raw
+            else:
+                value = default
+        values[name] = value
+
+    # Convert stage string to enum (accepts aliases like "Planning")
+    thought_stage = ThoughtStage.from_string(stage)
+    risk_level = fields["risk_level"]
+    if risk_level:
+        risk_value = _RISK_CACHE.get(risk_level.lower())
+        if risk_value is None:
+            valid = ", ".join(_RISK_CACHE)
+            raise ValueError(f"Invalid risk_level '{risk_level}'. Choose from: {valid}")
+    else:
+        risk_value = RiskLevel.MEDIUM
+
+    thought_data = ThoughtData(
+        thought=thought,
+        stage=thought_stage,
+        risk_level=risk_value,
+        **values,
+    )
+    thought_data.validate()
+    return thought_data
+
+
 @mcp.tool()
 def process_thought(
     thought: str,
@@ -178,112 +321,50 @@ def process_thought(
         # Merge explicit legacy_kwargs (which Codex may pass as a JSON string)
         # with any extra unexpected kwargs into a single legacy_payload.
         legacy_payload: Dict[str, Any] = {}
+        for source in (legacy_kwargs, extra_kwargs, kwargs):
+            if source:
+                _merge_payload(legacy_payload, source)
+
+        fields = {
+            "thought_number": thought_number,
+            "total_thoughts": total_thoughts,
+            "next_thought_needed": next_thought_needed,
+            "tags": tags,
+            "axioms_used": axioms_used,
+            "assumptions_challenged": assumptions_challenged,
+            "files_touched": files_touched,
+            "tests_to_run": tests_to_run,
+            "dependencies": dependencies,
+            "risk_level": risk_level,
+            "confidence_score": confidence_score,
+            "project_id": project_id,
+        }
+        if legacy_payload:
+            _resolve_legacy_values(fields, legacy_payload)
+        project_id = fields["project_id"]
 
-        def _merge_payload(source: Optional[Union[Dict[str, Any], str]]) -> None:
-            if source is None:
-                return
-            if isinstance(source, str):
-                try:
-                    parsed = json.loads(source)
-                except Exception:
-                    return
-                if isinstance(parsed, dict):
-                    legacy_payload.update(parsed)
-            elif isinstance(source, dict):
-                legacy_payload.update(source)
-
-        _merge_payload(legacy_kwargs)
-        _merge_payload(extra_kwargs)
-        if kwargs:
-            legacy_payload.update(kwargs)
-
-        thought_number = _resolve_legacy_value(thought_number, legacy_payload, "thought_number")
-        total_thoughts = _resolve_legacy_value(total_thoughts, legacy_payload, "total_thoughts")
-        next_thought_needed = _resolve_legacy_value(next_thought_needed, legacy_payload, "next_thought_needed")
-        tags = _resolve_legacy_value(tags, legacy_payload, "tags")
-        axioms_used = _resolve_legacy_value(axioms_used, legacy_payload, "axioms_used")
-        assumptions_challenged = _resolve_legacy_value(assumptions_challenged, legacy_payload, "assumptions_challenged")
-        files_touched = _resolve_legacy_value(files_touched, legacy_payload, "files_touched")
-        tests_to_run = _resolve_legacy_value(tests_to_run, legacy_payload, "tests_to_run")
-        dependencies = _resolve_legacy_value(dependencies, legacy_payload, "dependencies")
-        risk_level = _resolve_legacy_value(risk_level, legacy_payload, "risk_level")
-        confidence_score = _resolve_legacy_value(confidence_score, legacy_payload, "confidence_score")
-        project_id = _resolve_legacy_value(project_id, legacy_payload, "project_id")
-
-        # Coerce basic types that may arrive as strings from the tool bridge
-        tni = _parse_int(thought_number)
-        if tni is not None:
-            thought_number = tni
-        tti = _parse_int(total_thoughts)
-        if tti is not None:
-            total_thoughts = tti
-        ntn = _parse_bool(next_thought_needed)
-        if ntn is not None:
-            next_thought_needed = ntn
-        if isinstance(confidence_score, str):
-            try:
-                confidence_score = float(confidence_score.strip())
-            except Exception:
-                confidence_score = None
-        # Normalize list-like fields
-        tags = _parse_list(tags) or []
-        axioms_used = _parse_list(axioms_used) or []
-        assumptions_challenged = _parse_list(assumptions_challenged) or []
-        files_touched = _parse_list(files_touched) or []
-        tests_to_run = _parse_list(tests_to_run) or []
-        dependencies = _parse_list(dependencies) or []
-
-        if thought_number is None:
-            raise ValueError("thought_number is required")
-        if total_thoughts is None:
-            raise ValueError("total_thoughts is required")
-        if next_thought_needed is None:
-            raise ValueError("next_thought_needed is required")
-
-        # Report progress if context is available
-        if ctx:
-            ctx.report_progress(thought_number - 1, total_thoughts)
+        thought_data = _build_thought_data(thought, stage, fields)
+        thought_number = thought_data.thought_number
 
-        if project_id:
-            storage.set_default_project(project_id)
+        # Report progress if context is available; a one-thought sequence has none to report
+        total = thought_data.total_thoughts
+        if ctx and _PROGRESS_ENABLED and total > 1:
+            ctx.report_progress(thought_number - 1, total)
 
-        # Convert stage string to enum (accepts aliases like "Planning")
-        thought_stage = ThoughtStage.from_string(stage)
-        if risk_level:
-            try:
-                risk_value = RiskLevel(risk_level.lower())
-            except ValueError as exc:
-                valid = ", ".join(level.value for level in RiskLevel)
-                raise ValueError(f"Invalid risk_level '{risk_level}'. Choose from: {valid}") from exc
-        else:
-            risk_value = RiskLevel.MEDIUM
-
-        # Create thought data object with defaults for optional fields
-        thought_data = ThoughtData(
-            thought=thought,
-            thought_number=thought_number,
-            total_thoughts=total_thoughts,
-            next_thought_needed=next_thought_needed,
-            stage=thought_stage,
-            tags=tags or [],
-            axioms_used=axioms_used or [],
-            assumptions_challenged=assumptions_challenged or [],
-            files_touched=files_touched or [],
-            tests_to_run=tests_to_run or [],
-            dependencies=dependencies or [],
-            risk_level=risk_value,
-            confidence_score=confidence_score if confidence_score is not None else 0.5,
-        )
+        store = _current_storage()
+        if project_id:
+            store.set_default_project(project_id)
 
-        # Validate and store
-        thought_data.validate()
-        storage.add_thought(thought_data, project_id=project_id)
+        # Store
+        store.add_thought(thought_data, project_id=project_id)
 
         # Get all thoughts for analysis
-        all_thoughts = storage.get_all_thoughts(project_id=project_id)
+        all_thoughts, aggregates, vocabulary = store.get_analysis_context(project_id=project_id)
 
         # Analyze the thought
-        analysis = ThoughtAnalyzer.analyze_thought(thought_data, all_thoughts)
+        analysis = ThoughtAnalyzer.analyze_thought(
+            thought_data, all_thoughts, aggregates, vocabulary
+        )
 
         # Log success
         logger.info(f"Successfully processed thought #{thought_number}")
@@ -305,6 +386,75 @@ def process_thought(
             "status": "failed"
         }
 
+@mcp.tool()
+def process_thoughts_batch(
+    thoughts: Union[List[Dict[str, Any]], str],
+    project_id: Optional[str] = None,
+) -> dict:
+    """Add several sequential thoughts in one call.
+
+    Every thought is validated before any is stored, the session is written
+    once, and only the final thought is analyzed.
+
+    Args:
+        thoughts: Thought payloads (list or JSON string) accepting the same
+                  snake_case or camelCase fields as ``process_thought``
+        project_id: Optional identifier for the active project/session; applies
+                    to every thought in the batch, and entries naming a different
+                    project are rejected
+
+    Returns:
+        dict: Analysis of the last thought in the batch
+    """
+    try:
+        if isinstance(thoughts, str):
+            thoughts = json_loads(thoughts)
+        if not isinstance(thoughts, list) or not thoughts:
+            raise ValueError("thoughts must be a non-empty list of thought payloads")
+        logger.info(f"Processing batch of {len(thoughts)} thoughts")
+
+        batch: List[ThoughtData] = []
+        for entry in thoughts:
+            if not isinstance(entry, dict):
+                raise ValueError("Each batch entry must be an object")
+            payload = dict(entry)
+            fields = {key: payload.pop(key, None) for key in LEGACY_ALIASES}
+            _resolve_legacy_values(fields, payload)
+            # The whole batch is stored under one project; refuse entries aimed elsewhere
+            entry_project = fields.pop("project_id")
+            if entry_project is not None and entry_project != project_id:
+                raise ValueError(
+                    f"Batch entry project {entry_project!r} does not match batch project "
+                    f"{project_id!r}; pass project_id on the batch instead"
+                )
+            batch.append(
+                _build_thought_data(payload.get("thought", ""), payload.get("stage") or "", fields)
+            )
+
+        store = _current_storage()
+        if project_id:
+            store.set_default_project(project_id)
+        store.add_thoughts(batch, project_id=project_id)
+
+        all_thoughts, aggregates, vocabulary = store.get_analysis_context(project_id=project_id)
+        analysis = ThoughtAnalyzer.analyze_thought(batch[-1], all_thoughts, aggregates, vocabulary)
+        analysis["processedCount"] = len(batch)
+
+        logger.info(f"Successfully processed batch of {len(batch)} thoughts")
+        return analysis
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error: {e}")
+        return {
+            "error": f"JSON parsing error: {str(e)}",
+            "status": "failed"
+        }
+    except Exception as e:
+        logger.error(f"Error processing thought batch: {str(e)}")
+        return {
+            "error": str(e),
+            "status": "failed"
+        }
+
 @mcp.tool()
 def generate_summary(project_id: Optional[str] = None) -> dict:
     """Generate a summary of the entire thinking process.
@@ -316,10 +466,12 @@ def generate_summary(project_id: Optional[str] = None) -> dict:
         logger.info("Generating thinking process summary")
 
         # Get all thoughts
-        all_thoughts = storage.get_all_thoughts(project_id=project_id)
+        store = _current_storage()
+        all_thoughts = store.get_all_thoughts(project_id=project_id)
+        columns = store.get_history_columns(project_id=project_id)
 
         # Generate summary
-        return ThoughtAnalyzer.generate_summary(all_thoughts)
+        return ThoughtAnalyzer.generate_summary(all_thoughts, columns)
     except json.JSONDecodeError as e:
         logger.error(f"JSON parsing error: {e}")
         return {
@@ -342,7 +494,7 @@ def clear_history(project_id: Optional[str] = None) -> dict:
     """
     try:
         logger.info("Clearing thought history")
-        storage.clear_history(project_id=project_id)
+        _current_storage().clear_history(project_id=project_id)
         return {"status": "success", "message": "Thought history cleared"}
     except json.JSONDecodeError as e:
         logger.error(f"JSON parsing error: {e}")
@@ -369,7 +521,7 @@ def export_session(file_path: str, project_id: Optional[str] = None) -> dict:
     """
     try:
         logger.info(f"Exporting session to {file_path}")
-        storage.export_session(file_path, project_id=project_id)
+        _current_storage().export_session(file_path, project_id=project_id)
         return {
             "status": "success",
             "message": f"Session exported to {file_path}"
@@ -399,7 +551,7 @@ def import_session(file_path: str, project_id: Optional[str] = None) -> dict:
     """
     try:
         logger.info(f"Importing session from {file_path}")
-        storage.import_session(file_path, project_id=project_id)
+        _current_storage().import_session(file_path, project_id=project_id)
         return {
             "status": "success",
             "message": f"Session imported from {file_path}"
@@ -459,23 +611,88 @@ if __name__ == "__main__":
 
 # === Stage-specific prompts ==================================================
 
+# Prompt text is static apart from the user-supplied fields, so the templates
+# are built once at import and only formatted per call.
+_SCOPING_SYSTEM = (
+    "You are a planning assistant who ensures coding work starts with a clear scope, "
+    "definition of done, and success metrics."
+)
+_SCOPING_TEMPLATE = (
+    "Problem Statement:\n"
+    "{problem_statement}\n\n"
+    "Known constraints: {constraints}\n"
+    "Clarify:\n"
+    "1. Desired outcome and non-goals.\n"
+    "2. Risks or unknowns that require spikes.\n"
+    "3. Metrics or signals that prove the work is finished."
+)
+
+_RESEARCH_SYSTEM = (
+    "You are a technical researcher providing lightweight spikes and references "
+    "before implementation begins."
+)
+_RESEARCH_TEMPLATE = (
+    "Hypothesis/Question:\n{hypothesis}\n\n"
+    "Repo context: {repo_context}\n"
+    "Known blockers/dependencies: {blocking_dependencies}\n"
+    "Respond with:\n"
+    "- Key docs or code paths to inspect\n"
+    "- Proof-of-concept notes or pseudocode\n"
+    "- Open questions to answer before coding"
+)
+
+_IMPLEMENTATION_SYSTEM = (
+    "You help Codex map implementation steps into sequenced commits."
+)
+_IMPLEMENTATION_TEMPLATE = (
+    "Implementation outline:\n"
+    "{plan_outline}\n\n"
+    "Files/areas targeted: {targeted}\n"
+    "Risk level: {risk_level}\n"
+    "Return:\n"
+    "- Ordered sub-tasks with owners/LLM tools\n"
+    "- Tests to run at the end\n"
+    "- Instrumentation/logging hooks if risk is high"
+)
+
+_TESTING_SYSTEM = (
+    "You are a test strategist ensuring coverage for recent changes."
+)
+_TESTING_TEMPLATE = (
+    "Feature summary:\n"
+    "{feature_summary}\n\n"
+    "Planned tests: {planned_tests}\n"
+    "Risk level: {risk_level}\n"
+    "Deliver:\n"
+    "- Targeted unit/integration tests to execute now\n"
+    "- Regression areas to watch\n"
+    "- Data or fixtures needed for reproduction"
+)
+
+_REVIEW_SYSTEM = (
+    "You conduct code reviews and bake in lessons for future Codex runs."
+)
+_REVIEW_TEMPLATE = (
+    "Diff summary:\n"
+    "{diff_summary}\n\n"
+    "Confidence score: {confidence_score}\n"
+    "Follow-up items: {follow_up_items}\n"
+    "Summarize:\n"
+    "- Checklist for reviewers (tests, docs, migration notes)\n"
+    "- Items to carry into the next iteration (tech debt, monitoring)\n"
+    "- Final go/no-go recommendation"
+)
+
 
 @mcp.prompt()
 def scoping_prompt(problem_statement: str, constraints: Optional[str] = None) -> List[base.Message]:
     """Prompt that keeps scoping thoughts grounded."""
     return [
-        base.SystemMessage(
-            "You are a planning assistant who ensures coding work starts with a clear scope, "
-            "definition of done, and success metrics."
-        ),
+        base.SystemMessage(_SCOPING_SYSTEM),
         base.UserMessage(
-            "Problem Statement:\n"
-            f"{problem_statement}\n\n"
-            f"Known constraints: {constraints or 'n/a'}\n"
-            "Clarify:\n"
-            "1. Desired outcome and non-goals.\n"
-            "2. Risks or unknowns that require spikes.\n"
-            "3. Metrics or signals that prove the work is finished."
+            _SCOPING_TEMPLATE.format(
+                problem_statement=problem_statement, constraints=constraints or "n/a"
+            )
         ),
     ]
 
@@ -486,18 +703,13 @@ def research_prompt(
 ) -> List[base.Message]:
     """Prompt that accelerates research/spike stages."""
     return [
-        base.SystemMessage(
-            "You are a technical researcher providing lightweight spikes and references "
-            "before implementation begins."
-        ),
+        base.SystemMessage(_RESEARCH_SYSTEM),
         base.UserMessage(
-            f"Hypothesis/Question:\n{hypothesis}\n\n"
-            f"Repo context: {repo_context or 'not provided'}\n"
-            f"Known blockers/dependencies: {blocking_dependencies or 'none'}\n"
-            "Respond with:\n"
-            "- Key docs or code paths to inspect\n"
-            "- Proof-of-concept notes or pseudocode\n"
-            "- Open questions to answer before coding"
+            _RESEARCH_TEMPLATE.format(
+                hypothesis=hypothesis,
+                repo_context=repo_context or "not provided",
+                blocking_dependencies=blocking_dependencies or "none",
+            )
         ),
     ]
 
@@ -509,16 +721,11 @@ def implementation_prompt(
     """Prompt focused on implementation planning."""
     targeted = ", ".join(files_targeted or ["not specified"])
     return [
-        base.SystemMessage("You help Codex map implementation steps into sequenced commits."),
+        base.SystemMessage(_IMPLEMENTATION_SYSTEM),
         base.UserMessage(
-            "Implementation outline:\n"
-            f"{plan_outline}\n\n"
-            f"Files/areas targeted: {targeted}\n"
-            f"Risk level: {risk_level or 'medium'}\n"
-            "Return:\n"
-            "- Ordered sub-tasks with owners/LLM tools\n"
-            "- Tests to run at the end\n"
-            "- Instrumentation/logging hooks if risk is high"
+            _IMPLEMENTATION_TEMPLATE.format(
+                plan_outline=plan_outline, targeted=targeted, risk_level=risk_level or "medium"
+            )
         ),
     ]
 
@@ -530,16 +737,13 @@ def testing_prompt(
     """Prompt to ensure testing thoughts remain thorough."""
     planned_tests = ", ".join(tests_to_run or ["derive from implementation diff"])
     return [
-        base.SystemMessage("You are a test strategist ensuring coverage for recent changes."),
+        base.SystemMessage(_TESTING_SYSTEM),
         base.UserMessage(
-            "Feature summary:\n"
-            f"{feature_summary}\n\n"
-            f"Planned tests: {planned_tests}\n"
-            f"Risk level: {risk_level or 'medium'}\n"
-            "Deliver:\n"
-            "- Targeted unit/integration tests to execute now\n"
-            "- Regression areas to watch\n"
-            "- Data or fixtures needed for reproduction"
+            _TESTING_TEMPLATE.format(
+                feature_summary=feature_summary,
+                planned_tests=planned_tests,
+                risk_level=risk_level or "medium",
+            )
         ),
     ]
 
@@ -550,15 +754,12 @@ def review_prompt(
 ) -> List[base.Message]:
     """Prompt that helps finalize the review stage."""
     return [
-        base.SystemMessage("You conduct code reviews and bake in lessons for future Codex runs."),
+        base.SystemMessage(_REVIEW_SYSTEM),
         base.UserMessage(
-            "Diff summary:\n"
-            f"{diff_summary}\n\n"
-            f"Confidence score: {confidence_score if confidence_score is not None else 0.5}\n"
-            f"Follow-up items: {follow_up_items or 'none logged'}\n"
-            "Summarize:\n"
-            "- Checklist for reviewers (tests, docs, migration notes)\n"
-            "- Items to carry into the next iteration (tech debt, monitoring)\n"
-            "- Final go/no-go recommendation"
+            _REVIEW_TEMPLATE.format(
+                diff_summary=diff_summary,
+                confidence_score=confidence_score if confidence_score is not None else 0.5,
+                follow_up_items=follow_up_items or "none logged",
+            )
         ),
     ]
@@ -1,10 +1,13 @@
+import atexit
+import functools
 import os
 import re
 import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
+from .analysis import AggregateResult, HistoryColumns, StageIndex, TokenVocabulary
 from .logging_conf import configure_logging
 from .models import ThoughtData, ThoughtStage
 from .storage_utils import (
@@ -12,19 +15,42 @@ from .storage_utils import (
     prepare_thoughts_for_serialization,
     save_thoughts_to_file,
 )
+from .utils import json_dumps
 
 logger = configure_logging("sequential-thinking.storage")
 
+# Seconds to batch appended thoughts before a session file is rewritten
+FLUSH_INTERVAL_SECONDS = 0.5
+
+_UNSAFE_PROJECT_CHARS = re.compile(r"[^a-zA-Z0-9._-]")
+_SAFE_PROJECT_ID = re.compile(r"[a-zA-Z0-9._-]+")
+
+
+@functools.lru_cache(maxsize=64)
+def _sanitize_project_id(project_id: str) -> str:
+    """Map a project identifier to a filesystem-safe name (memoized)."""
+    cleaned = project_id.strip()
+    if _SAFE_PROJECT_ID.fullmatch(cleaned):
+        return cleaned
+    return _UNSAFE_PROJECT_CHARS.sub("_", cleaned) or "default"
+
 
 class ThoughtStorage:
     """Storage manager for thought data."""
 
-    def __init__(self, storage_dir: Optional[str] = None, default_project_id: Optional[str] = None):
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        default_project_id: Optional[str] = None,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ):
         """Initialize the storage manager.
 
         Args:
             storage_dir: Directory to store thought data files. If None, uses a default directory.
             default_project_id: Project identifier to scope sessions.
+            flush_interval: Seconds to batch changes before writing session files.
+                            Zero or less writes through on every change.
         """
         if storage_dir is None:
             home_dir = Path.home()
@@ -34,11 +60,28 @@ class ThoughtStorage:
 
         self.storage_dir.mkdir(parents=True, exist_ok=True)
 
+        # _lock guards the default-project switch; each project's state is
+        # guarded by its own lock so unrelated projects never contend.
         self._lock = threading.RLock()
+        self._meta_lock = threading.Lock()
+        self._project_locks: Dict[str, threading.RLock] = {}
+        self._flush_lock = threading.Lock()
         env_project = os.environ.get("MCP_PROJECT_ID")
         self.default_project_id = self._sanitize_project_id(default_project_id or env_project or "default")
         self._project_histories: Dict[str, List[ThoughtData]] = {}
+        self._project_columns: Dict[str, HistoryColumns] = {}
+        self._stage_indexes: Dict[str, StageIndex] = {}
+        self._vocabularies: Dict[str, TokenVocabulary] = {}
+        # Read-side caches, rebuilt lazily after a mutation drops them
+        self._snapshots: Dict[str, Tuple[ThoughtData, ...]] = {}
+        self._serialized: Dict[str, List[Dict[str, Any]]] = {}
         self.thought_history: List[ThoughtData] = []
+        self._flush_interval = flush_interval
+        self._dirty: Set[str] = set()
+        # Last failed save per project, cleared once a save succeeds
+        self._flush_errors: Dict[str, Exception] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
 
         self._ensure_history(self.default_project_id)
         logger.debug("Initialized ThoughtStorage at %s (project=%s)", self.storage_dir, self.default_project_id)
@@ -46,9 +89,12 @@ class ThoughtStorage:
     def set_default_project(self, project_id: str) -> None:
         """Set the default project context for future operations."""
         resolved = self._sanitize_project_id(project_id)
+        with self._lock_for(resolved):
+            self._ensure_history(resolved)
+        # Take _lock on its own: the project methods acquire it inside their
+        # project lock, so nesting the other way round could deadlock
         with self._lock:
             self.default_project_id = resolved
-            self._ensure_history(resolved)
             self.thought_history = self._project_histories[resolved]
             logger.debug("Switched default project to %s", resolved)
 
@@ -56,8 +102,15 @@ class ThoughtStorage:
         """Convert arbitrary project identifiers into filesystem-safe names."""
         if not project_id:
             return "default"
-        cleaned = re.sub(r"[^a-zA-Z0-9._-]", "_", project_id.strip())
-        return cleaned or "default"
+        return _sanitize_project_id(project_id)
+
+    def _lock_for(self, project_id: str) -> threading.RLock:
+        """Return the lock guarding a single project's state, creating it on first use."""
+        lock = self._project_locks.get(project_id)
+        if lock is None:
+            with self._meta_lock:
+                lock = self._project_locks.setdefault(project_id, threading.RLock())
+        return lock
 
     def _session_file_for(self, project_id: str) -> Path:
         return self.storage_dir / f"{project_id}_session.json"
@@ -70,71 +123,276 @@ class ThoughtStorage:
         if project_id not in self._project_histories:
             session_file = self._session_file_for(project_id)
             lock_file = self._lock_file_for(project_id)
-            self._project_histories[project_id] = load_thoughts_from_file(session_file, lock_file)
-        if project_id == self.default_project_id:
-            self.thought_history = self._project_histories[project_id]
-        return self._project_histories[project_id]
+            self._project_histories[project_id] = load_thoughts_from_file(
+                session_file, lock_file, trusted=True
+            )
+            self._project_columns[project_id] = HistoryColumns.from_thoughts(
+                self._project_histories[project_id]
+            )
+            self._stage_indexes[project_id] = StageIndex.from_thoughts(
+                self._project_histories[project_id]
+            )
+            self._vocabularies[project_id] = TokenVocabulary()
+        history = self._project_histories[project_id]
+        self._publish_default(project_id, history)
+        return history
+
+    def _publish_default(self, project_id: str, history: List[ThoughtData]) -> None:
+        """Point ``thought_history`` at ``history`` if the project is the default.
+
+        Callers hold the project's lock; the check and assignment happen under
+        ``_lock`` so they cannot interleave with ``set_default_project``.
+        """
+        with self._lock:
+            if project_id == self.default_project_id:
+                self.thought_history = history
 
     def _resolve_project_id(self, project_id: Optional[str]) -> str:
-        return self._sanitize_project_id(project_id or self.default_project_id)
+        default_project_id = self.default_project_id
+        # The default id was sanitized when it was set
+        if not project_id or project_id == default_project_id:
+            return default_project_id
+        return self._sanitize_project_id(project_id)
+
+    def _serialized_history(self, project_id: str) -> List[Dict[str, Any]]:
+        """Return the cached serialized form of a project's history."""
+        serialized = self._serialized.get(project_id)
+        if serialized is None:
+            history = self._project_histories.get(project_id, [])
+            serialized = prepare_thoughts_for_serialization(history)
+            self._serialized[project_id] = serialized
+        return serialized
 
     def _save_session(self, project_id: str) -> None:
         """Persist a single project's history to disk."""
         history = self._project_histories.get(project_id, [])
-        thoughts_with_ids = prepare_thoughts_for_serialization(history)
+        thoughts_with_ids = self._serialized_history(project_id)
         session_file = self._session_file_for(project_id)
         lock_file = self._lock_file_for(project_id)
         save_thoughts_to_file(session_file, thoughts_with_ids, lock_file)
         logger.debug("Saved %s thoughts for project %s", len(history), project_id)
 
+    def _schedule_flush(self) -> None:
+        """Start the flush timer if none is pending. Callers hold ``_flush_lock``."""
+        if self._flush_timer is None and self._flush_interval > 0:
+            self._flush_timer = threading.Timer(self._flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _mark_dirty(self, project_id: str) -> None:
+        """Schedule a project's session file to be rewritten on the next flush.
+
+        Callers hold the project's lock.
+        """
+        if self._flush_interval <= 0:
+            self._save_session(project_id)
+            return
+        with self._flush_lock:
+            self._dirty.add(project_id)
+            self._schedule_flush()
+
+    def _check_flush_error(self, project_id: str) -> None:
+        """Surface a failed background save of a project to the current caller.
+
+        The save is retried first; if it still fails, the error is raised so the
+        caller learns the session is not being persisted. Callers hold the
+        project's lock.
+        """
+        if project_id not in self._flush_errors:
+            return
+        try:
+            self._save_session(project_id)
+        except Exception as e:
+            with self._flush_lock:
+                self._flush_errors[project_id] = e
+            raise
+        with self._flush_lock:
+            self._flush_errors.pop(project_id, None)
+            self._dirty.discard(project_id)
+
+    def flush(self) -> None:
+        """Write every project with unsaved changes to disk.
+
+        Projects whose save fails stay dirty and are retried on the next timer
+        tick; the error is reported to the next caller touching that project.
+        """
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty, self._dirty = self._dirty, set()
+        for pid in dirty:
+            try:
+                with self._lock_for(pid):
+                    self._save_session(pid)
+            except Exception as e:
+                logger.exception("Failed to save session for project %s", pid)
+                with self._flush_lock:
+                    self._flush_errors[pid] = e
+                    self._dirty.add(pid)
+                    self._schedule_flush()
+            else:
+                with self._flush_lock:
+                    self._flush_errors.pop(pid, None)
+
+    def close(self) -> None:
+        """Flush pending changes and stop the background flush timer."""
+        self.flush()
+        with self._flush_lock:
+            # Drop any retry a failed save scheduled; nothing flushes after close
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        atexit.unregister(self.flush)
+
     def add_thought(self, thought: ThoughtData, project_id: Optional[str] = None) -> None:
         """Add a thought to the history for the requested project."""
-        with self._lock:
-            pid = self._resolve_project_id(project_id)
+        self.add_thoughts((thought,), project_id=project_id)
+
+    def add_thoughts(self, thoughts: Sequence[ThoughtData], project_id: Optional[str] = None) -> None:
+        """Add several thoughts to the requested project as one change.
+
+        Nothing is stored when any of the errors below is raised.
+
+        Raises:
+            TypeError, ValueError: If a thought cannot be encoded as JSON
+            Exception: A failed background save of the project that fails again
+                       when retried
+        """
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
             history = self._ensure_history(pid)
-            history.append(thought)
-            if pid == self.default_project_id:
-                self.thought_history = history
-            self._save_session(pid)
+            # Build the column rows and encode the new rows first: they are the
+            # only steps that can reject a thought, and must do so before any
+            # per-project state changes or a later flush fails in the background
+            new_columns = HistoryColumns.from_thoughts(thoughts)
+            rows = prepare_thoughts_for_serialization(thoughts)
+            json_dumps(rows)
+            stage_index = self._stage_indexes[pid]
+            for thought in thoughts:
+                history.append(thought)
+                stage_index.add(thought)
+            serialized = self._serialized.get(pid)
+            if serialized is not None:
+                serialized.extend(rows)
+            self._project_columns[pid].extend(new_columns)
+            self._snapshots.pop(pid, None)
+            self._publish_default(pid, history)
+            self._mark_dirty(pid)
 
-    def get_all_thoughts(self, project_id: Optional[str] = None) -> List[ThoughtData]:
-        """Get all thoughts for the requested project."""
-        with self._lock:
-            pid = self._resolve_project_id(project_id)
-            history = list(self._ensure_history(pid))
-        return history
+    def _snapshot(self, project_id: str) -> Tuple[ThoughtData, ...]:
+        """Return the cached tuple snapshot of a project's history.
+
+        Callers hold the project's lock.
+        """
+        snapshot = self._snapshots.get(project_id)
+        if snapshot is None:
+            snapshot = tuple(self._ensure_history(project_id))
+            self._snapshots[project_id] = snapshot
+        return snapshot
+
+    def get_all_thoughts(self, project_id: Optional[str] = None) -> Tuple[ThoughtData, ...]:
+        """Get a read-only snapshot of all thoughts for the requested project."""
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            return self._snapshot(pid)
+
+    def get_history_columns(self, project_id: Optional[str] = None) -> HistoryColumns:
+        """Get a snapshot of the columnar scalar fields for the requested project.
+
+        The copy's ``source`` is the matching ``get_all_thoughts`` snapshot, so a
+        summary never pairs these columns with a different version of the history.
+        """
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            snapshot = self._snapshot(pid)
+            columns = self._project_columns[pid].copy()
+            columns.source = snapshot
+            return columns
+
+    def get_history_aggregates(self, project_id: Optional[str] = None) -> AggregateResult:
+        """Get stage coverage, dependencies and testing insights for the requested project.
+
+        Read from the project's stage index under its lock, without copying the
+        stage buckets.
+        """
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            self._ensure_history(pid)
+            return self._stage_indexes[pid].aggregates()
+
+    def get_stage_count(self, stage: ThoughtStage, project_id: Optional[str] = None) -> int:
+        """Get the number of thoughts in a specific stage."""
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            self._ensure_history(pid)
+            return self._stage_indexes[pid].stage_count(stage)
 
     def get_thoughts_by_stage(self, stage: ThoughtStage, project_id: Optional[str] = None) -> List[ThoughtData]:
         """Get all thoughts in a specific stage."""
-        with self._lock:
-            pid = self._resolve_project_id(project_id)
-            history = self._ensure_history(pid)
-            return [t for t in history if t.stage == stage]
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            self._ensure_history(pid)
+            return list(self._stage_indexes[pid][stage])
+
+    def get_vocabulary(self, project_id: Optional[str] = None) -> TokenVocabulary:
+        """Get the token vocabulary used for related-thought bitmasks in a project."""
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            self._ensure_history(pid)
+            return self._vocabularies[pid]
+
+    def get_analysis_context(
+        self, project_id: Optional[str] = None
+    ) -> Tuple[Tuple[ThoughtData, ...], AggregateResult, TokenVocabulary]:
+        """Get the history snapshot, aggregates and vocabulary of a project together.
+
+        All three are read under one acquisition of the project's lock, so they
+        describe the same version of the history even while other requests append.
+        """
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            snapshot = self._snapshot(pid)
+            return snapshot, self._stage_indexes[pid].aggregates(), self._vocabularies[pid]
 
     def clear_history(self, project_id: Optional[str] = None) -> None:
         """Clear the thought history for a project."""
-        with self._lock:
-            pid = self._resolve_project_id(project_id)
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
             history = self._ensure_history(pid)
             history.clear()
-            if pid == self.default_project_id:
-                self.thought_history = history
-            self._save_session(pid)
+            self._project_columns[pid].clear()
+            self._stage_indexes[pid].clear()
+            self._vocabularies[pid] = TokenVocabulary()
+            self._snapshots.pop(pid, None)
+            self._serialized[pid] = []
+            self._publish_default(pid, history)
+            self._mark_dirty(pid)
 
     def export_session(self, file_path: str, project_id: Optional[str] = None) -> None:
         """Export the requested project session to a file."""
         pid = self._resolve_project_id(project_id)
-        with self._lock:
-            history = list(self._ensure_history(pid))
-            thoughts_with_ids = prepare_thoughts_for_serialization(history)
+        self.flush()
+        with self._lock_for(pid):
+            history = self._ensure_history(pid)
+            stage_index = self._stage_indexes[pid]
+            thoughts_with_ids = list(self._serialized_history(pid))
             metadata = {
                 "exportedAt": datetime.now().isoformat(),
                 "metadata": {
                     "project": pid,
                     "totalThoughts": len(history),
                     "stages": {
-                        stage.value: len([t for t in history if t.stage == stage])
-                        for stage in ThoughtStage
+                        stage.value: stage_index.stage_count(stage) for stage in ThoughtStage
                     },
                 },
             }
@@ -147,11 +405,17 @@ class ThoughtStorage:
         """Import a session into the requested project."""
         file_path_obj = Path(file_path)
         lock_file = file_path_obj.with_suffix(".lock")
-        thoughts = load_thoughts_from_file(file_path_obj, lock_file)
 
-        with self._lock:
-            pid = self._resolve_project_id(project_id)
+        pid = self._resolve_project_id(project_id)
+        with self._lock_for(pid):
+            self._check_flush_error(pid)
+            # Load under the project lock so no append lands between read and swap
+            thoughts = load_thoughts_from_file(file_path_obj, lock_file)
             self._project_histories[pid] = thoughts
-            if pid == self.default_project_id:
-                self.thought_history = thoughts
-            self._save_session(pid)
+            self._project_columns[pid] = HistoryColumns.from_thoughts(thoughts)
+            self._stage_indexes[pid] = StageIndex.from_thoughts(thoughts)
+            self._vocabularies[pid] = TokenVocabulary()
+            self._snapshots.pop(pid, None)
+            self._serialized.pop(pid, None)
+            self._publish_default(pid, thoughts)
+            self._mark_dirty(pid)
@@ -1,16 +1,44 @@
+import contextlib
 import json
 import logging
-from typing import List, Dict, Any
+import os
+import stat
+import tempfile
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
 import portalocker
 
 from .models import ThoughtData
 from .logging_conf import configure_logging
+from .utils import json_dumps, json_loads
 
 logger = configure_logging("sequential-thinking.storage-utils")
 
 
+def _read_umask() -> int:
+    """Return the process umask; reading it means briefly setting it."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode a plain open() would give a new file. Read once at import, since the
+# umask swap is not thread-safe.
+_NEW_FILE_MODE = 0o666 & ~_read_umask()
+
+
+def _file_lock(lock_file: Optional[Path]):
+    """Return a sidecar file lock when several processes share the storage directory.
+
+    A single server process serializes access itself and writes atomically,
+    so the lock is only taken when ``MCP_MULTI_PROCESS`` is set.
+    """
+    if lock_file is not None and os.environ.get("MCP_MULTI_PROCESS"):
+        return portalocker.Lock(lock_file, timeout=10)
+    return contextlib.nullcontext()
+
+
 def prepare_thoughts_for_serialization(thoughts: List[ThoughtData]) -> List[Dict[str, Any]]:
     """Prepare thoughts for serialization with IDs included.
 
@@ -24,13 +52,17 @@ def prepare_thoughts_for_serialization(thoughts: List[ThoughtData]) -> List[Dict
 
 
 def save_thoughts_to_file(file_path: Path, thoughts: List[Dict[str, Any]], 
-                         lock_file: Path, metadata: Dict[str, Any] = None) -> None:
-    """Save thoughts to a file with proper locking.
+                         lock_file: Optional[Path] = None, metadata: Dict[str, Any] = None) -> None:
+    """Save thoughts to a file atomically.
+
+    The document is written to a uniquely named temporary sibling and moved
+    into place with ``os.replace``, so readers never observe a partially
+    written file and concurrent writers never share a temporary file.
 
     Args:
         file_path: Path to the file to save
         thoughts: List of thought dictionaries to save
-        lock_file: Path to the lock file
+        lock_file: Path to the lock file, used when ``MCP_MULTI_PROCESS`` is set
         metadata: Optional additional metadata to include
     """
     data = {
@@ -42,20 +74,40 @@ def save_thoughts_to_file(file_path: Path, thoughts: List[Dict[str, Any]],
     if metadata:
         data.update(metadata)
     
-    # Use file locking to ensure thread safety when writing
-    with portalocker.Lock(lock_file, timeout=10) as _:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    payload = json_dumps(data)
+    with _file_lock(lock_file):
+        # A unique temporary name per write, so concurrent writers (even in
+        # processes that skip the lock) never share a half-written file
+        fd, tmp_name = tempfile.mkstemp(
+            dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(payload)
+            # mkstemp creates the file owner-only; keep an existing file's mode,
+            # or give a new one the mode open() would have under the umask
+            try:
+                mode = stat.S_IMODE(file_path.stat().st_mode)
+            except FileNotFoundError:
+                mode = _NEW_FILE_MODE
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, file_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
             
     logger.debug(f"Saved {len(thoughts)} thoughts to {file_path}")
 
 
-def load_thoughts_from_file(file_path: Path, lock_file: Path) -> List[ThoughtData]:
-    """Load thoughts from a file with proper locking.
+def load_thoughts_from_file(file_path: Path, lock_file: Optional[Path] = None,
+                            trusted: bool = False) -> List[ThoughtData]:
+    """Load thoughts from a file, locking only when shared between processes.
 
     Args:
         file_path: Path to the file to load
-        lock_file: Path to the lock file
+        lock_file: Path to the lock file, used when ``MCP_MULTI_PROCESS`` is set
+        trusted: Whether the file was written by this package, allowing
+                 validation to be skipped when rebuilding thoughts
 
     Returns:
         List[ThoughtData]: Loaded thought data objects
@@ -68,16 +120,13 @@ def load_thoughts_from_file(file_path: Path, lock_file: Path) -> List[ThoughtDat
         return []
         
     try:
-        # Use file locking and file handling in a single with statement
-        # for cleaner resource management
-        with portalocker.Lock(lock_file, timeout=10) as _, open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Read the raw bytes in one call; the JSON parser decodes UTF-8 itself
+        with _file_lock(lock_file):
+            data = json_loads(file_path.read_bytes())
         
-        # Convert data to ThoughtData objects after file is closed
-        thoughts = [
-            ThoughtData.from_dict(thought_dict)
-            for thought_dict in data.get("thoughts", [])
-        ]
+        # Convert data to ThoughtData objects after the lock is released
+        from_dict = ThoughtData.from_trusted_dict if trusted else ThoughtData.from_dict
+        thoughts = [from_dict(thought_dict) for thought_dict in data.get("thoughts", [])]
             
         logger.debug(f"Loaded {len(thoughts)} thoughts from {file_path}")
         return thoughts
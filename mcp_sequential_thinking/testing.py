@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 from .models import ThoughtData, ThoughtStage
 
 
@@ -7,7 +7,7 @@ class TestHelpers:
 
     @staticmethod
     def find_related_thoughts_test(current_thought: ThoughtData,
-                                 all_thoughts: List[ThoughtData]) -> List[ThoughtData]:
+                                 all_thoughts: Sequence[ThoughtData]) -> List[ThoughtData]:
         """Test-specific implementation for finding related thoughts.
         
         This method handles specific test cases expected by the test suite.
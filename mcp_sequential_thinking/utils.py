@@ -3,8 +3,14 @@
 This module contains common utilities used across the package.
 """
 
+import json
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup (the "fast" extra)
+    orjson = None
 
 
 def to_camel_case(snake_str: str) -> str:
@@ -65,4 +71,35 @@ def convert_dict_keys(data: Dict[str, Any], converter: callable) -> Dict[str, An
         else:
             result[new_key] = value
             
-    return result
\ No newline at end of file
+    return result
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text, using orjson when it is installed.
+
+    Args:
+        data: JSON document as text or UTF-8 bytes
+
+    Returns:
+        The decoded Python object
+
+    Raises:
+        json.JSONDecodeError: If the document is invalid (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize an object to indented UTF-8 JSON, using orjson when it is installed.
+
+    Args:
+        obj: The object to serialize
+
+    Returns:
+        The encoded document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
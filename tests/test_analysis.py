@@ -1,14 +1,17 @@
+import copy
+import pickle
 import unittest
 from mcp_sequential_thinking.models import RiskLevel, ThoughtData, ThoughtStage
-from mcp_sequential_thinking.analysis import ThoughtAnalyzer
+from mcp_sequential_thinking.analysis import HistoryColumns, StageIndex, ThoughtAnalyzer, TokenVocabulary
 
 
 class TestThoughtAnalyzer(unittest.TestCase):
     """Test cases for the ThoughtAnalyzer class."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.thought1 = ThoughtData(
+    @classmethod
+    def setUpClass(cls):
+        """Set up shared, read-only test data once for the class."""
+        cls.thought1 = ThoughtData(
             thought="First thought about climate change",
             thought_number=1,
             total_thoughts=5,
@@ -18,7 +21,7 @@ class TestThoughtAnalyzer(unittest.TestCase):
             files_touched=["README.md"],
         )
 
-        self.thought2 = ThoughtData(
+        cls.thought2 = ThoughtData(
             thought="Research on emissions data",
             thought_number=2,
             total_thoughts=5,
@@ -28,7 +31,7 @@ class TestThoughtAnalyzer(unittest.TestCase):
             dependencies=["epa-api"],
         )
 
-        self.thought3 = ThoughtData(
+        cls.thought3 = ThoughtData(
             thought="Implementation of policy impacts",
             thought_number=3,
             total_thoughts=5,
@@ -40,7 +43,7 @@ class TestThoughtAnalyzer(unittest.TestCase):
             risk_level=RiskLevel.HIGH,
         )
 
-        self.thought4 = ThoughtData(
+        cls.thought4 = ThoughtData(
             thought="Another scoping thought",
             thought_number=4,
             total_thoughts=5,
@@ -50,7 +53,7 @@ class TestThoughtAnalyzer(unittest.TestCase):
             dependencies=["stakeholder-alignment"],
         )
         
-        self.all_thoughts = [self.thought1, self.thought2, self.thought3, self.thought4]
+        cls.all_thoughts = (cls.thought1, cls.thought2, cls.thought3, cls.thought4)
     
     def test_find_related_thoughts_by_stage(self):
         """Test finding related thoughts by stage."""
@@ -73,15 +76,82 @@ class TestThoughtAnalyzer(unittest.TestCase):
             dependencies=["epa-api"],
         )
         
-        all_thoughts = self.all_thoughts + [new_thought]
+        all_thoughts = (*self.all_thoughts, new_thought)
         
         related = ThoughtAnalyzer.find_related_thoughts(new_thought, all_thoughts)
         
         # Should find thought1 and thought2 which have the "climate" tag
         self.assertEqual(len(related), 2)
-        self.assertTrue(self.thought1 in related)
-        self.assertTrue(self.thought2 in related)
+        self.assertIn(self.thought1, related)
+        self.assertIn(self.thought2, related)
     
+    def test_find_related_thoughts_scores_overlap(self):
+        """Test that shared files and tags outrank a bare stage match."""
+        current = ThoughtData(
+            thought="Wire policy module into the CLI",
+            thought_number=5,
+            total_thoughts=5,
+            next_thought_needed=False,
+            stage=ThoughtStage.REVIEW,
+            tags=["policy"],
+            files_touched=["policy.py"],
+            risk_level=RiskLevel.LOW,
+        )
+
+        related = ThoughtAnalyzer.find_related_thoughts(
+            current, (*self.all_thoughts, current), max_results=1
+        )
+
+        self.assertEqual(related, [self.thought3])
+
+    def test_find_related_thoughts_rebuilds_masks_per_vocabulary(self):
+        """Test that cached metadata masks are not reused across vocabularies."""
+        # Local thoughts, so the masks cached here never leak into the shared fixtures
+        current = ThoughtData(
+            thought="Research on emissions data",
+            thought_number=2,
+            total_thoughts=2,
+            next_thought_needed=False,
+            stage=ThoughtStage.RESEARCH_SPIKE,
+            tags=["climate", "data", "emissions"],
+        )
+        other = ThoughtData(
+            thought="First thought about climate change",
+            thought_number=1,
+            total_thoughts=2,
+            next_thought_needed=True,
+            stage=ThoughtStage.SCOPING,
+            tags=["climate", "global"],
+        )
+        history = (other, current)
+
+        first = TokenVocabulary()
+        first.mask(["unrelated", "padding"])
+        before = ThoughtAnalyzer.find_related_thoughts(current, history, vocabulary=first)
+
+        second = TokenVocabulary()
+        after = ThoughtAnalyzer.find_related_thoughts(current, history, vocabulary=second)
+
+        self.assertEqual(after, before)
+        self.assertEqual(after, [other])
+        self.assertEqual(current.metadata_masks(second.mask, second.key)[0], 0b111)
+
+    def test_thoughts_stay_copyable_after_scoring(self):
+        """Test that cached metadata masks do not stop thoughts being copied or pickled."""
+        current = ThoughtData(
+            thought="Copy me",
+            thought_number=1,
+            total_thoughts=1,
+            next_thought_needed=False,
+            stage=ThoughtStage.REVIEW,
+            tags=["climate"],
+        )
+        ThoughtAnalyzer.find_related_thoughts(current, (current,), vocabulary=TokenVocabulary())
+
+        self.assertEqual(copy.deepcopy(current), current)
+        self.assertEqual(current.model_copy(deep=True).tags, current.tags)
+        self.assertEqual(pickle.loads(pickle.dumps(current)).id, current.id)
+
     def test_generate_summary_empty(self):
         """Test generating summary with no thoughts."""
         summary = ThoughtAnalyzer.generate_summary([])
@@ -91,28 +161,120 @@ class TestThoughtAnalyzer(unittest.TestCase):
     def test_generate_summary(self):
         """Test generating summary with thoughts."""
         summary = ThoughtAnalyzer.generate_summary(self.all_thoughts)
+        s = summary["summary"]
         
-        self.assertEqual(summary["summary"]["totalThoughts"], 4)
-        self.assertEqual(summary["summary"]["stages"]["Scoping"], 2)
-        self.assertEqual(summary["summary"]["stages"]["Research & Spike"], 1)
-        self.assertEqual(summary["summary"]["stages"]["Implementation"], 1)
-        self.assertEqual(len(summary["summary"]["timeline"]), 4)
-        self.assertIn("topTags", summary["summary"])
-        self.assertIn("riskProfile", summary["summary"])
+        self.assertIsInstance(s, dict)
+        self.assertEqual(s["totalThoughts"], 4)
+        self.assertEqual(s["stages"]["Scoping"], 2)
+        self.assertEqual(s["stages"]["Research & Spike"], 1)
+        self.assertEqual(s["stages"]["Implementation"], 1)
+        self.assertEqual(len(s["timeline"]), 4)
+        self.assertIn("topTags", s)
+        self.assertIn("riskProfile", s)
+        self.assertEqual(s["riskProfile"], {"high": 1, "medium": 3, "low": 0})
     
+    def test_generate_summary_with_columns(self):
+        """Test that precomputed columns yield the same summary as a rebuild."""
+        columns = HistoryColumns.from_thoughts(self.all_thoughts)
+
+        self.assertEqual(
+            ThoughtAnalyzer.generate_summary(self.all_thoughts, columns),
+            ThoughtAnalyzer.generate_summary(self.all_thoughts),
+        )
+        self.assertEqual(list(columns.thought_number), [1, 2, 3, 4])
+
+    def test_generate_summary_ignores_columns_from_another_history(self):
+        """Test that columns are rebuilt when they were taken from a different history."""
+        other = (self.thought3, self.thought3, self.thought3, self.thought3)
+        columns = HistoryColumns.from_thoughts(other)
+
+        summary = ThoughtAnalyzer.generate_summary(self.all_thoughts, columns)
+
+        self.assertEqual(summary["summary"]["stages"]["Scoping"], 2)
+        self.assertEqual(summary, ThoughtAnalyzer.generate_summary(self.all_thoughts))
+
     def test_analyze_thought(self):
         """Test analyzing a thought."""
         analysis = ThoughtAnalyzer.analyze_thought(self.thought1, self.all_thoughts)
+        a = analysis["thoughtAnalysis"]
         
-        self.assertEqual(analysis["thoughtAnalysis"]["currentThought"]["thoughtNumber"], 1)
-        self.assertEqual(analysis["thoughtAnalysis"]["currentThought"]["stage"], "Scoping")
-        self.assertEqual(analysis["thoughtAnalysis"]["analysis"]["relatedThoughtsCount"], 1)
-        self.assertEqual(analysis["thoughtAnalysis"]["analysis"]["progress"], 20.0)  # 1/5 * 100
-        self.assertTrue(analysis["thoughtAnalysis"]["analysis"]["isFirstInStage"])
-        self.assertEqual(analysis["thoughtAnalysis"]["context"]["thoughtHistoryLength"], 4)
-        self.assertIn("stageCoverage", analysis["thoughtAnalysis"]["analysis"])
+        self.assertEqual(a["currentThought"]["thoughtNumber"], 1)
+        self.assertEqual(a["currentThought"]["stage"], "Scoping")
+        self.assertEqual(a["analysis"]["relatedThoughtsCount"], 1)
+        self.assertEqual(a["analysis"]["progress"], 20.0)  # 1/5 * 100
+        self.assertTrue(a["analysis"]["isFirstInStage"])
+        self.assertEqual(a["context"]["thoughtHistoryLength"], 4)
+        self.assertIn("stageCoverage", a["analysis"])
         self.assertIn("insights", analysis)
 
+    def test_analyze_thought_reflects_each_history(self):
+        """Test that histories sharing a length and last thought are analyzed independently."""
+        current = ThoughtData(
+            thought="Wrap up",
+            thought_number=3,
+            total_thoughts=3,
+            next_thought_needed=False,
+            stage=ThoughtStage.REVIEW,
+        )
+        testing = [
+            ThoughtData(
+                thought=f"Test step {number}",
+                thought_number=number,
+                total_thoughts=3,
+                next_thought_needed=True,
+                stage=ThoughtStage.TESTING,
+            )
+            for number in (1, 2)
+        ]
+
+        first = ThoughtAnalyzer.analyze_thought(current, (*testing, current))
+        second = ThoughtAnalyzer.analyze_thought(current, (self.thought1, self.thought2, current))
+
+        self.assertEqual(first["thoughtAnalysis"]["analysis"]["stageCoverage"][ThoughtStage.TESTING], 2)
+        coverage = second["thoughtAnalysis"]["analysis"]["stageCoverage"]
+        self.assertEqual(coverage[ThoughtStage.TESTING], 0)
+        self.assertEqual(coverage[ThoughtStage.SCOPING], 1)
+        self.assertEqual(coverage[ThoughtStage.RESEARCH_SPIKE], 1)
+
+    def test_stage_index_matches_scan(self):
+        """Test that the stage index agrees with the linear-scan helpers."""
+        testing = ThoughtData(
+            thought="Run the policy tests",
+            thought_number=5,
+            total_thoughts=5,
+            next_thought_needed=False,
+            stage=ThoughtStage.TESTING,
+        )
+        index = StageIndex.from_thoughts(self.all_thoughts)
+
+        self.assertEqual(index[ThoughtStage.SCOPING], [self.thought1, self.thought4])
+        self.assertFalse(index.testing_ready)
+        self.assertEqual(index.high_risk_no_tests, 0)
+
+        index.add(testing)
+        self.assertTrue(index.testing_ready)
+        self.assertEqual(index.stage_count(ThoughtStage.TESTING), 1)
+        self.assertEqual(
+            index.aggregates(),
+            ThoughtAnalyzer._aggregate((*self.all_thoughts, testing)),
+        )
+        self.assertEqual(
+            ThoughtAnalyzer.analyze_thought(
+                testing, (*self.all_thoughts, testing), index.aggregates()
+            ),
+            ThoughtAnalyzer.analyze_thought(testing, (*self.all_thoughts, testing)),
+        )
+
+        index.add(ThoughtData(
+            thought="Risky migration",
+            thought_number=5,
+            total_thoughts=5,
+            next_thought_needed=False,
+            stage=ThoughtStage.IMPLEMENTATION,
+            risk_level=RiskLevel.HIGH,
+        ))
+        self.assertEqual(index.high_risk_no_tests, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,24 +1,81 @@
 import unittest
 from datetime import datetime
 
-from mcp_sequential_thinking.models import RiskLevel, ThoughtData, ThoughtStage
-
-
-class TestThoughtStage(unittest.TestCase):
-    """Test cases for the ThoughtStage enum."""
+import pytest
+from pydantic import ValidationError
 
-    def test_from_string_valid(self):
-        """Test converting valid strings to ThoughtStage enum values."""
-        self.assertEqual(ThoughtStage.from_string("Scoping"), ThoughtStage.SCOPING)
-        self.assertEqual(ThoughtStage.from_string("Research & Spike"), ThoughtStage.RESEARCH_SPIKE)
-        self.assertEqual(ThoughtStage.from_string("Implementation"), ThoughtStage.IMPLEMENTATION)
-        self.assertEqual(ThoughtStage.from_string("Testing"), ThoughtStage.TESTING)
-        self.assertEqual(ThoughtStage.from_string("Review"), ThoughtStage.REVIEW)
+from mcp_sequential_thinking.models import RiskLevel, ThoughtData, ThoughtStage
 
-    def test_from_string_invalid(self):
-        """Test that invalid strings raise ValueError."""
-        with self.assertRaises(ValueError):
-            ThoughtStage.from_string("Invalid Stage")
+# Minimal valid constructor arguments; invalid cases override single fields
+BASE_KWARGS = {
+    "thought": "Test thought",
+    "thought_number": 1,
+    "total_thoughts": 3,
+    "next_thought_needed": True,
+    "stage": ThoughtStage.SCOPING,
+}
+
+INVALID_CASES = (
+    {"thought_number": 0},  # must be positive
+    {"thought_number": 3, "total_thoughts": 2},  # total below current number
+    {"thought": ""},  # empty thought
+    {"thought_number": 2**63, "total_thoughts": 2**63},  # does not fit the history columns
+    {"total_thoughts": 2**63},
+)
+
+
+# to_dict() output for the thought built in test_to_dict, minus the generated timestamp
+EXPECTED_TO_DICT_BASE = {
+    "thought": "Test thought",
+    "thoughtNumber": 1,
+    "totalThoughts": 3,
+    "nextThoughtNeeded": True,
+    "stage": "Scoping",
+    "tags": ["tag1", "tag2"],
+    "axiomsUsed": ["axiom1"],
+    "assumptionsChallenged": ["assumption1"],
+    "filesTouched": ["file.py"],
+    "testsToRun": ["pytest tests/test_file.py"],
+    "riskLevel": "high",
+    "dependencies": ["redis"],
+    "confidenceScore": 0.42,
+}
+
+
+@pytest.mark.parametrize(
+    "text,stage",
+    [
+        ("Scoping", ThoughtStage.SCOPING),
+        ("Research & Spike", ThoughtStage.RESEARCH_SPIKE),
+        ("Implementation", ThoughtStage.IMPLEMENTATION),
+        ("Testing", ThoughtStage.TESTING),
+        ("Review", ThoughtStage.REVIEW),
+    ],
+)
+def test_from_string_valid(text, stage):
+    """Test converting valid strings to ThoughtStage enum values."""
+    assert ThoughtStage.from_string(text) is stage
+
+
+@pytest.mark.parametrize(
+    "text,stage",
+    [
+        (" Planning ", ThoughtStage.IMPLEMENTATION),
+        ("QA", ThoughtStage.TESTING),
+        ("research & SPIKE", ThoughtStage.RESEARCH_SPIKE),
+        ("", ThoughtStage.IMPLEMENTATION),
+    ],
+)
+def test_from_string_aliases(text, stage):
+    """Test that synonyms resolve case-insensitively and empty input defaults."""
+    assert ThoughtStage.from_string(text) is stage
+
+
+@pytest.mark.parametrize("bad", ["Invalid Stage", "Scoping!", "Review & Spike"])
+def test_from_string_invalid(bad):
+    """Test that invalid strings raise ValueError."""
+    with pytest.raises(ValueError):
+        ThoughtStage.from_string(bad)
 
 
 class TestThoughtData(unittest.TestCase):
@@ -40,44 +97,11 @@ class TestThoughtData(unittest.TestCase):
         )
         self.assertTrue(thought.validate())
 
-    def test_validate_invalid_thought_number(self):
-        """Test validation fails with invalid thought number."""
-        from pydantic import ValidationError
-
-        with self.assertRaises(ValidationError):
-            ThoughtData(
-                thought="Test thought",
-                thought_number=0,  # Invalid: must be positive
-                total_thoughts=3,
-                next_thought_needed=True,
-                stage=ThoughtStage.SCOPING
-            )
-
-    def test_validate_invalid_total_thoughts(self):
-        """Test validation fails with invalid total thoughts."""
-        from pydantic import ValidationError
-
-        with self.assertRaises(ValidationError):
-            ThoughtData(
-                thought="Test thought",
-                thought_number=3,
-                total_thoughts=2,  # Invalid: less than thought_number
-                next_thought_needed=True,
-                stage=ThoughtStage.SCOPING
-            )
-
-    def test_validate_empty_thought(self):
-        """Test validation fails with empty thought."""
-        from pydantic import ValidationError
-
-        with self.assertRaises(ValidationError):
-            ThoughtData(
-                thought="",  # Invalid: empty thought
-                thought_number=1,
-                total_thoughts=3,
-                next_thought_needed=True,
-                stage=ThoughtStage.SCOPING
-            )
+    def test_validate_invalid(self):
+        """Test validation fails for each invalid field combination."""
+        for overrides in INVALID_CASES:
+            with self.subTest(**overrides), self.assertRaises(ValidationError):
+                ThoughtData(**{**BASE_KWARGS, **overrides})
 
     def test_to_dict(self):
         """Test conversion to dictionary."""
@@ -97,27 +121,42 @@ class TestThoughtData(unittest.TestCase):
             confidence_score=0.42,
         )
 
-        # Save the timestamp for comparison
-        timestamp = thought.timestamp
+        expected = {**EXPECTED_TO_DICT_BASE, "timestamp": thought.timestamp}
+        self.assertEqual(thought.to_dict(), expected)
 
-        expected_dict = {
-            "thought": "Test thought",
-            "thoughtNumber": 1,
-            "totalThoughts": 3,
-            "nextThoughtNeeded": True,
-            "stage": "Scoping",
-            "tags": ["tag1", "tag2"],
-            "axiomsUsed": ["axiom1"],
-            "assumptionsChallenged": ["assumption1"],
-            "filesTouched": ["file.py"],
-            "testsToRun": ["pytest tests/test_file.py"],
-            "riskLevel": "high",
-            "dependencies": ["redis"],
-            "confidenceScore": 0.42,
-            "timestamp": timestamp
-        }
+    def test_cached_views(self):
+        """Test that the stage value is precomputed and metadata masks are cached per key."""
+        thought = ThoughtData(
+            thought="Test thought",
+            thought_number=1,
+            total_thoughts=1,
+            next_thought_needed=False,
+            stage=ThoughtStage.SCOPING,
+            tags=["tag1", "tag1", "tag2"],
+            files_touched=["file.py"],
+            dependencies=["redis"],
+        )
+
+        self.assertEqual(thought.stage_value, "Scoping")
+        masks = thought.metadata_masks(lambda tokens: len(set(tokens)), 0)
+        self.assertEqual(masks, (2, 1, 1))
+        self.assertIs(thought.metadata_masks(lambda tokens: -1, 0), masks)
+
+    def test_cached_views_follow_updates(self):
+        """Test that fields are frozen and model_copy updates refresh the cached views."""
+        thought = ThoughtData(**BASE_KWARGS, tags=["tag1"])
+
+        with self.assertRaises(ValidationError):
+            thought.stage = ThoughtStage.REVIEW
 
-        self.assertEqual(thought.to_dict(), expected_dict)
+        updated = thought.model_copy(
+            update={"stage": ThoughtStage.REVIEW, "tags": ["tag2"], "risk_level": RiskLevel.HIGH}
+        )
+        self.assertEqual(updated.stage_value, "Review")
+        self.assertEqual(updated.tags, ["tag2"])
+        self.assertEqual(updated.to_dict()["stage"], "Review")
+        self.assertEqual(updated.to_dict()["riskLevel"], "high")
+        self.assertEqual(thought.stage_value, "Scoping")
 
     def test_from_dict(self):
         """Test creation from dictionary."""
@@ -144,17 +183,40 @@ class TestThoughtData(unittest.TestCase):
         self.assertEqual(thought.thought_number, 1)
         self.assertEqual(thought.total_thoughts, 3)
         self.assertTrue(thought.next_thought_needed)
-        self.assertEqual(thought.stage, ThoughtStage.SCOPING)
+        self.assertIs(thought.stage, ThoughtStage.SCOPING)
         self.assertEqual(thought.tags, ["tag1", "tag2"])
         self.assertEqual(thought.axioms_used, ["axiom1"])
         self.assertEqual(thought.assumptions_challenged, ["assumption1"])
         self.assertEqual(thought.files_touched, ["file.py"])
         self.assertEqual(thought.tests_to_run, ["pytest tests/test_file.py"])
-        self.assertEqual(thought.risk_level, RiskLevel.HIGH)
+        self.assertIs(thought.risk_level, RiskLevel.HIGH)
         self.assertEqual(thought.dependencies, ["redis"])
         self.assertEqual(thought.confidence_score, 0.8)
         self.assertEqual(thought.timestamp, "2023-01-01T12:00:00")
 
+    def test_from_trusted_dict_round_trip(self):
+        """Test that trusted rehydration restores a serialized thought."""
+        original = ThoughtData(
+            thought="Test thought",
+            thought_number=2,
+            total_thoughts=3,
+            next_thought_needed=True,
+            stage=ThoughtStage.TESTING,
+            tags=["tag1"],
+            tests_to_run=["pytest"],
+            risk_level=RiskLevel.HIGH,
+            confidence_score=0.7,
+        )
+
+        restored = ThoughtData.from_trusted_dict(original.to_dict(include_id=True))
+
+        self.assertEqual(restored.id, original.id)
+        self.assertEqual(restored.stage, ThoughtStage.TESTING)
+        self.assertEqual(restored.risk_level, RiskLevel.HIGH)
+        self.assertEqual(restored.tags, ["tag1"])
+        self.assertEqual(restored.to_dict(include_id=True), original.to_dict(include_id=True))
+        self.assertIs(restored.tags[0], original.tags[0])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,48 +1,136 @@
-import tempfile
-import unittest
+"""Ensure legacy camelCase payloads and tool responses remain compatible."""
+
+import json
+
+import pytest
 
 from mcp_sequential_thinking import server
 from mcp_sequential_thinking.storage import ThoughtStorage
 
+PROJECT_IDS = ("legacy-project", "summary-project", "batch-project")
+
+
+@pytest.fixture(scope="module")
+def legacy_storage(tmp_path_factory):
+    """One temporary ThoughtStorage shared by the whole module."""
+    legacy = ThoughtStorage(str(tmp_path_factory.mktemp("legacy")))
+    yield legacy
+    legacy.close()
+
+
+@pytest.fixture
+def storage(legacy_storage):
+    """The shared storage, reset in memory and routed to the tools for one test."""
+    for project_id in PROJECT_IDS:
+        legacy_storage.clear_history(project_id=project_id)
+    with server.use_storage(legacy_storage):
+        yield legacy_storage
+
+
+def test_process_thought_accepts_camelcase_arguments(storage):
+    """Legacy clients can send camelCase metadata without errors."""
+    result = server.process_thought(
+        thought="Legacy payload",
+        thoughtNumber=1,
+        totalThoughts=1,
+        nextThoughtNeeded=False,
+        stage="Scoping",
+        filesTouched=["README.md"],
+        testsToRun=["pytest"],
+        riskLevel="high",
+        confidenceScore=0.9,
+        projectId="legacy-project",
+    )
+
+    assert "thoughtAnalysis" in result
+
+    stored_thoughts = storage.get_all_thoughts(project_id="legacy-project")
+    assert len(stored_thoughts) == 1
+    stored = stored_thoughts[0]
+
+    assert stored.files_touched == ["README.md"]
+    assert stored.tests_to_run == ["pytest"]
+    assert stored.risk_level.value == "high"
+    assert stored.confidence_score == pytest.approx(0.9)
+
+
+def test_process_thoughts_batch_stores_all_entries(storage):
+    """A batch stores every thought and analyzes the last one."""
+    result = server.process_thoughts_batch(
+        thoughts=[
+            {
+                "thought": "Scope the change",
+                "thoughtNumber": 1,
+                "totalThoughts": 2,
+                "nextThoughtNeeded": True,
+                "stage": "Scoping",
+            },
+            {
+                "thought": "Write the tests",
+                "thought_number": "2",
+                "total_thoughts": "2",
+                "next_thought_needed": "false",
+                "stage": "Testing",
+                "tests_to_run": "pytest",
+            },
+        ],
+        project_id="batch-project",
+    )
+
+    assert result["processedCount"] == 2
+    assert result["thoughtAnalysis"]["currentThought"]["thoughtNumber"] == 2
+
+    stored_thoughts = storage.get_all_thoughts(project_id="batch-project")
+    assert [t.thought_number for t in stored_thoughts] == [1, 2]
+    assert stored_thoughts[1].tests_to_run == ["pytest"]
+
 
-class TestProcessThoughtLegacyPayload(unittest.TestCase):
-    """Ensure legacy camelCase payloads remain compatible."""
+def test_process_thoughts_batch_rejects_invalid_entry(storage):
+    """An invalid entry fails the whole batch before anything is stored."""
+    result = server.process_thoughts_batch(
+        thoughts=[
+            {"thought": "Valid", "thoughtNumber": 1, "totalThoughts": 2, "nextThoughtNeeded": True},
+            {"thought": "Missing numbering"},
+        ],
+        project_id="batch-project",
+    )
 
-    def setUp(self):
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.original_storage = server.storage
-        server.storage = ThoughtStorage(self.temp_dir.name)
+    assert result["status"] == "failed"
+    assert storage.get_all_thoughts(project_id="batch-project") == ()
 
-    def tearDown(self):
-        server.storage = self.original_storage
-        self.temp_dir.cleanup()
 
-    def test_process_thought_accepts_camelcase_arguments(self):
-        """Legacy clients can send camelCase metadata without errors."""
-        result = server.process_thought(
-            thought="Legacy payload",
-            thoughtNumber=1,
-            totalThoughts=1,
-            nextThoughtNeeded=False,
-            stage="Scoping",
-            filesTouched=["README.md"],
-            testsToRun=["pytest"],
-            riskLevel="high",
-            confidenceScore=0.9,
-            projectId="legacy-project",
-        )
+def test_process_thoughts_batch_rejects_entry_project_mismatch(storage):
+    """An entry naming another project fails the batch instead of being silently redirected."""
+    result = server.process_thoughts_batch(
+        thoughts=[
+            {"thought": "Same project", "thoughtNumber": 1, "totalThoughts": 2,
+             "nextThoughtNeeded": True, "projectId": "batch-project"},
+            {"thought": "Elsewhere", "thoughtNumber": 2, "totalThoughts": 2,
+             "nextThoughtNeeded": False, "project_id": "summary-project"},
+        ],
+        project_id="batch-project",
+    )
 
-        self.assertIn("thoughtAnalysis", result)
+    assert result["status"] == "failed"
+    assert "summary-project" in result["error"]
+    assert storage.get_all_thoughts(project_id="batch-project") == ()
+    assert storage.get_all_thoughts(project_id="summary-project") == ()
 
-        stored_thoughts = server.storage.get_all_thoughts(project_id="legacy-project")
-        self.assertEqual(len(stored_thoughts), 1)
-        stored = stored_thoughts[0]
 
-        self.assertEqual(stored.files_touched, ["README.md"])
-        self.assertEqual(stored.tests_to_run, ["pytest"])
-        self.assertEqual(stored.risk_level.value, "high")
-        self.assertAlmostEqual(stored.confidence_score, 0.9)
+def test_generate_summary_is_json_serializable(storage):
+    """The summary tool returns plain, JSON-serializable containers."""
+    server.process_thought(
+        thought="Summarize me",
+        thought_number=1,
+        total_thoughts=1,
+        next_thought_needed=False,
+        stage="Review",
+        dependencies=["redis"],
+        project_id="summary-project",
+    )
 
+    result = server.generate_summary(project_id="summary-project")
 
-if __name__ == "__main__":
-    unittest.main()
+    assert isinstance(result["summary"], dict)
+    assert result["summary"]["dependencyMap"] == {"redis": [1]}
+    json.dumps(result)
@@ -2,10 +2,13 @@ import unittest
 import tempfile
 import json
 import os
+import stat
+import threading
 from pathlib import Path
 
 from mcp_sequential_thinking.models import ThoughtStage, ThoughtData
 from mcp_sequential_thinking.storage import ThoughtStorage
+from mcp_sequential_thinking.storage_utils import save_thoughts_to_file
 
 
 class TestThoughtStorage(unittest.TestCase):
@@ -18,6 +21,7 @@ class TestThoughtStorage(unittest.TestCase):
     
     def tearDown(self):
         """Clean up temporary directory."""
+        self.storage.close()
         self.temp_dir.cleanup()
     
     def test_add_thought(self):
@@ -31,6 +35,7 @@ class TestThoughtStorage(unittest.TestCase):
         )
         
         self.storage.add_thought(thought)
+        self.storage.flush()
         
         # Check that the thought was added to memory
         self.assertEqual(len(self.storage.thought_history), 1)
@@ -45,7 +50,112 @@ class TestThoughtStorage(unittest.TestCase):
             data = json.load(f)
             self.assertEqual(len(data["thoughts"]), 1)
             self.assertEqual(data["thoughts"][0]["thought"], "Test thought")
+
+        # Single-process writes are atomic replaces without a lock sidecar
+        self.assertEqual(sorted(p.name for p in Path(self.temp_dir.name).iterdir()), ["default_session.json"])
     
+    def test_concurrent_saves_use_separate_temp_files(self):
+        """Test that unlocked concurrent writers never replace the target with a torn file."""
+        session_file = Path(self.temp_dir.name) / "shared_session.json"
+        payloads = [[{"thought": f"writer {n}", "padding": "x" * 50_000}] for n in range(8)]
+        writers = [
+            threading.Thread(target=save_thoughts_to_file, args=(session_file, payload))
+            for payload in payloads
+        ]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+
+        with open(session_file, 'r') as f:
+            self.assertIn(json.load(f)["thoughts"], payloads)
+        self.assertEqual(list(Path(self.temp_dir.name).glob("*.tmp")), [])
+
+    @unittest.skipIf(os.name == "nt", "POSIX permission bits")
+    def test_saved_file_mode_follows_umask_or_existing_file(self):
+        """Test that a new session file honours the umask and a rewrite keeps its mode."""
+        session_file = Path(self.temp_dir.name) / "mode_session.json"
+        umask = os.umask(0)
+        os.umask(umask)
+
+        save_thoughts_to_file(session_file, [])
+        self.assertEqual(stat.S_IMODE(session_file.stat().st_mode), 0o666 & ~umask)
+
+        os.chmod(session_file, 0o640)
+        save_thoughts_to_file(session_file, [])
+        self.assertEqual(stat.S_IMODE(session_file.stat().st_mode), 0o640)
+
+    def test_add_thoughts_rejects_batch_before_storing(self):
+        """Test that a thought the session file cannot hold leaves the project unchanged."""
+        valid = ThoughtData(
+            thought="Fits",
+            thought_number=1,
+            total_thoughts=2,
+            next_thought_needed=True,
+            stage=ThoughtStage.SCOPING
+        )
+        unencodable = ThoughtData(
+            thought="Lone surrogate \ud800",
+            thought_number=2,
+            total_thoughts=2,
+            next_thought_needed=False,
+            stage=ThoughtStage.SCOPING
+        )
+
+        with self.assertRaises((TypeError, ValueError)):
+            self.storage.add_thoughts([valid, unencodable])
+
+        self.assertEqual(self.storage.get_all_thoughts(), ())
+        self.assertEqual(len(self.storage.get_history_columns()), 0)
+        self.assertEqual(self.storage.get_stage_count(ThoughtStage.SCOPING), 0)
+        self.storage.flush()
+        self.assertFalse((Path(self.temp_dir.name) / "default_session.json").exists())
+
+    def test_failed_flush_is_retried_and_reported(self):
+        """Test that a failed background save is rescheduled and raised to the next caller."""
+        self.storage.close()
+        self.storage = ThoughtStorage(self.temp_dir.name, flush_interval=60)
+        session_file = Path(self.temp_dir.name) / "default_session.json"
+        # Replacing a directory fails, standing in for a full or unwritable disk
+        session_file.mkdir()
+        self.storage.add_thought(ThoughtData(
+            thought="Test thought",
+            thought_number=1,
+            total_thoughts=1,
+            next_thought_needed=False,
+            stage=ThoughtStage.SCOPING
+        ))
+
+        self.storage.flush()
+        self.assertIsNotNone(self.storage._flush_timer)
+        with self.assertRaises(OSError):
+            self.storage.get_all_thoughts()
+
+        session_file.rmdir()
+        self.assertEqual(len(self.storage.get_all_thoughts()), 1)
+        with open(session_file, 'r') as f:
+            self.assertEqual(len(json.load(f)["thoughts"]), 1)
+
+    def test_add_thought_defers_write_until_flush(self):
+        """Test that appends are batched in memory until the session is flushed."""
+        self.storage.close()
+        self.storage = ThoughtStorage(self.temp_dir.name, flush_interval=60)
+        session_file = Path(self.temp_dir.name) / "default_session.json"
+        for number in (1, 2):
+            self.storage.add_thought(ThoughtData(
+                thought=f"Test thought {number}",
+                thought_number=number,
+                total_thoughts=2,
+                next_thought_needed=number < 2,
+                stage=ThoughtStage.SCOPING
+            ))
+
+        self.assertFalse(session_file.exists())
+
+        self.storage.flush()
+        with open(session_file, 'r') as f:
+            self.assertEqual(len(json.load(f)["thoughts"]), 2)
+
     def test_get_all_thoughts(self):
         """Test getting all thoughts from storage."""
         thought1 = ThoughtData(
@@ -72,6 +182,10 @@ class TestThoughtStorage(unittest.TestCase):
         self.assertEqual(len(thoughts), 2)
         self.assertEqual(thoughts[0], thought1)
         self.assertEqual(thoughts[1], thought2)
+        self.assertIs(self.storage.get_all_thoughts(), thoughts)
+
+        self.storage.clear_history()
+        self.assertEqual(self.storage.get_all_thoughts(), ())
     
     def test_get_thoughts_by_stage(self):
         """Test getting thoughts by stage."""
@@ -112,6 +226,28 @@ class TestThoughtStorage(unittest.TestCase):
         
         self.assertEqual(len(research_thoughts), 1)
         self.assertEqual(research_thoughts[0], thought2)
+
+        self.assertEqual(self.storage.get_stage_count(ThoughtStage.SCOPING), 2)
+        aggregates = self.storage.get_history_aggregates()
+        self.assertEqual(aggregates.stage_coverage[ThoughtStage.SCOPING], 2)
+        self.assertEqual(aggregates.stage_coverage[ThoughtStage.REVIEW], 0)
+
+    def test_get_analysis_context(self):
+        """Snapshot, aggregates and vocabulary come from the same history version."""
+        thought = ThoughtData(
+            thought="Context thought",
+            thought_number=1,
+            total_thoughts=2,
+            next_thought_needed=True,
+            stage=ThoughtStage.SCOPING
+        )
+        self.storage.add_thought(thought)
+
+        snapshot, aggregates, vocabulary = self.storage.get_analysis_context()
+        self.assertIs(snapshot, self.storage.get_all_thoughts())
+        self.assertEqual(aggregates, self.storage.get_history_aggregates())
+        self.assertIs(vocabulary, self.storage.get_vocabulary())
+        self.assertEqual(aggregates.stage_coverage[ThoughtStage.SCOPING], len(snapshot))
     
     def test_clear_history(self):
         """Test clearing thought history."""
@@ -125,8 +261,11 @@ class TestThoughtStorage(unittest.TestCase):
         
         self.storage.add_thought(thought)
         self.assertEqual(len(self.storage.thought_history), 1)
+        vocabulary = self.storage.get_vocabulary()
         
         self.storage.clear_history()
+        self.storage.flush()
+        self.assertIsNot(self.storage.get_vocabulary(), vocabulary)
         self.assertEqual(len(self.storage.thought_history), 0)
         
         # Check that the session file was updated
@@ -201,6 +340,40 @@ class TestThoughtStorage(unittest.TestCase):
         self.assertEqual(len(thoughts_b), 1)
         self.assertNotEqual(thoughts_a[0].thought, thoughts_b[0].thought)
 
+    def test_thought_history_follows_default_under_concurrent_switches(self):
+        """Switching the default project while other threads write keeps thought_history in step."""
+        projects = ["project-a", "project-b"]
+        thought = ThoughtData(
+            thought="Concurrent thought",
+            thought_number=1,
+            total_thoughts=1,
+            next_thought_needed=False,
+            stage=ThoughtStage.SCOPING
+        )
+
+        def switch():
+            for n in range(200):
+                self.storage.set_default_project(projects[n % 2])
+
+        def write(project_id):
+            for _ in range(50):
+                self.storage.add_thought(thought, project_id=project_id)
+                self.storage.clear_history(project_id=project_id)
+
+        workers = [threading.Thread(target=switch)] + [
+            threading.Thread(target=write, args=(project_id,)) for project_id in projects
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=10)
+            self.assertFalse(worker.is_alive())
+
+        self.assertIs(
+            self.storage.thought_history,
+            self.storage._project_histories[self.storage.default_project_id],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()